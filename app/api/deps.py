@@ -1,17 +1,59 @@
+import time
+
 from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
 
+from app.core.cache import auth_cache
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import SessionLocal, read_engines, read_session
 from app.models.user import User
 from app.schemas.auth import TokenPayload
+from app.schemas.user import CurrentUser
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+def _decode_token(token: str) -> TokenPayload:
+    cache_key = f"token:{token}"
+    cached = auth_cache.get(cache_key)
+    if cached is not None:
+        return TokenPayload.model_validate_json(cached)
+
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    token_data = TokenPayload(**payload)
+
+    # Nunca se cachea un token más allá de su expiración.
+    ttl = settings.auth_cache_ttl_seconds
+    if token_data.exp is not None:
+        ttl = min(ttl, token_data.exp - time.time())
+    if ttl > 0:
+        auth_cache.set(cache_key, token_data.model_dump_json().encode(), ttl)
+    return token_data
+
+
+async def _load_current_user(user_id: int) -> CurrentUser | None:
+    cache_key = f"user:{user_id}"
+    cached = auth_cache.get(cache_key)
+    if cached is not None:
+        return CurrentUser.model_validate_json(cached)
+
+    async with read_session() as db:
+        user = await db.get(User, user_id)
+    if user is None and read_engines:
+        # Puede ser un usuario recién registrado que la réplica todavía no tiene.
+        async with SessionLocal() as db:
+            user = await db.get(User, user_id)
+    if user is None:
+        return None
+    current_user = CurrentUser.model_validate(user)
+
+    if settings.auth_cache_ttl_seconds > 0:
+        auth_cache.set(cache_key, current_user.model_dump_json().encode(), settings.auth_cache_ttl_seconds)
+    return current_user
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -19,19 +61,17 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
     )
 
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        token_data = TokenPayload(**payload)
-        if token_data.sub is None:
-            raise credentials_exception
+        token_data = _decode_token(token)
+        user_id = int(token_data.sub)
     except JWTError as exc:
         raise credentials_exception from exc
     except ValueError as exc:
         raise credentials_exception from exc
 
-    user = db.get(User, int(token_data.sub))
-    if user is None:
+    current_user = await _load_current_user(user_id)
+    if current_user is None or current_user.token_version != token_data.ver:
         raise credentials_exception
-    return user
+    return current_user
 
 
 def require_n8n_api_key(x_n8n_key: str | None = Header(default=None)) -> None:
@@ -0,0 +1,65 @@
+import hashlib
+from typing import Any, Iterable
+
+import orjson
+from fastapi import Response, status
+from sqlalchemy import RowMapping, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.events import event_broker
+from app.models.post import Post
+from app.models.user import User
+
+# Columnas de PostOut más las del autor: el feed lee filas planas de un solo SELECT con JOIN a
+# users (sin ORM ni Pydantic por post), así la página trae sus autores en un round trip.
+FEED_COLUMNS = (Post.id, Post.content, Post.image_url, Post.image_variants, Post.owner_id, Post.created_at)
+AUTHOR_COLUMNS = (User.username.label("author_username"), User.avatar_url.label("author_avatar_url"))
+
+
+def select_feed(*extra_columns: Any) -> Select:
+    return select(*FEED_COLUMNS, *AUTHOR_COLUMNS, *extra_columns).join(User, User.id == Post.owner_id)
+
+
+def feed_item(row: RowMapping) -> dict[str, Any]:
+    item = {column.key: row[column.key] for column in FEED_COLUMNS}
+    item["author"] = {
+        "id": row["owner_id"],
+        "username": row["author_username"],
+        "avatar_url": row["author_avatar_url"],
+    }
+    return item
+
+
+def page_body(items: list[dict[str, Any]], next_cursor: str | None) -> bytes:
+    return orjson.dumps({"items": items, "next_cursor": next_cursor}, option=orjson.OPT_UTC_Z)
+
+
+def page_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def feed_response(body: bytes, etag: str, if_none_match: str | None) -> Response:
+    # El ETag se calcula una vez por página (al guardarla en caché): un GET condicional no rehashea el body.
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def publish_created_posts(db: AsyncSession, post_ids: Iterable[int]) -> None:
+    # Llamar después del commit. Los eventos llevan el mismo item que el feed (con autor).
+    ids = sorted(post_ids)
+    if not ids or not event_broker.has_listeners:
+        return
+    rows = (await db.execute(select_feed().where(Post.id.in_(ids)).order_by(Post.id))).mappings().all()
+    for row in rows:
+        await event_broker.publish("post.created", feed_item(row))
+
+
+async def publish_deleted_post(post_id: int) -> None:
+    await event_broker.publish("post.deleted", {"id": post_id})
@@ -0,0 +1,207 @@
+import hashlib
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+import orjson
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.models.automation import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+_BOUNDARY_RE = re.compile(rb'boundary="?([^";]+)"?', re.IGNORECASE)
+
+_next_purge_at = 0.0
+
+
+class _BodyFingerprint:
+    """Calcula el SHA-256 del cuerpo a medida que el endpoint lo lee, sin guardarlo en memoria.
+
+    El boundary de multipart cambia en cada reintento del cliente, así que se omite de la huella.
+    """
+
+    def __init__(self, receive: Receive, boundary: bytes = b"") -> None:
+        self._receive = receive
+        self._boundary = boundary
+        self._pending = b""
+        self._hash = hashlib.sha256()
+        self._complete = False
+
+    def _update(self, chunk: bytes) -> None:
+        if not self._boundary:
+            self._hash.update(chunk)
+            return
+        data = self._pending + chunk
+        start = 0
+        while (found := data.find(self._boundary, start)) != -1:
+            self._hash.update(data[start:found])
+            start = found + len(self._boundary)
+        # Un boundary puede quedar partido entre dos chunks.
+        keep = 0 if self._complete else min(len(data) - start, len(self._boundary) - 1)
+        self._hash.update(data[start : len(data) - keep])
+        self._pending = data[len(data) - keep :]
+
+    async def receive(self) -> Message:
+        message = await self._receive()
+        if message["type"] == "http.request":
+            self._complete = not message.get("more_body", False)
+            self._update(message.get("body", b""))
+        return message
+
+    async def hexdigest(self) -> str:
+        # Un replay se decide antes de leer el cuerpo: se consume lo que falte solo para la huella.
+        while not self._complete:
+            if (await self.receive())["type"] == "http.disconnect":
+                raise ClientDisconnect()
+        return self._hash.hexdigest()
+
+
+class IdempotencyFingerprintMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not any(
+            name == IDEMPOTENCY_HEADER.lower().encode() for name, _ in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        content_type = next((value for name, value in scope["headers"] if name == b"content-type"), b"")
+        boundary = _BOUNDARY_RE.search(content_type) if content_type.startswith(b"multipart/") else None
+        fingerprint = _BodyFingerprint(receive, boundary.group(1) if boundary else b"")
+        scope.setdefault("state", {})["idempotency_fingerprint"] = fingerprint
+        await self.app(scope, fingerprint.receive, send)
+
+
+def _key_scope(request: Request) -> str:
+    route = request.scope.get("route")
+    return f"{request.method} {route.name if route is not None else request.url.path}"
+
+
+async def _request_fingerprint(request: Request) -> str | None:
+    fingerprint: _BodyFingerprint | None = getattr(request.state, "idempotency_fingerprint", None)
+    return None if fingerprint is None else await fingerprint.hexdigest()
+
+
+async def _purge_expired_keys(db: AsyncSession, now: datetime) -> None:
+    global _next_purge_at
+    if time.monotonic() < _next_purge_at:
+        return
+    _next_purge_at = time.monotonic() + settings.idempotency_purge_interval_seconds
+    expired_before = now - timedelta(seconds=settings.idempotency_key_ttl_seconds)
+    await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < expired_before))
+
+
+async def claim_idempotency_key(db: AsyncSession, request: Request, key: str) -> Response | None:
+    """Reserva `key` para esta petición, dentro del endpoint que la recibe.
+
+    Devuelve None si la petición debe procesarse, o la respuesta guardada si la clave ya se usó.
+    Lanza 409 si otra petición con la misma clave sigue en curso y 422 si la clave ya se usó con
+    otro cuerpo.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} must be between 1 and {MAX_KEY_LENGTH} characters",
+        )
+
+    key_scope = _key_scope(request)
+    now = datetime.utcnow()
+    await _purge_expired_keys(db, now)
+    expired_before = now - timedelta(seconds=settings.idempotency_key_ttl_seconds)
+    await db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.scope == key_scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at < expired_before,
+        )
+    )
+    db.add(IdempotencyKey(scope=key_scope, key=key, created_at=now))
+    try:
+        await db.commit()
+        return None
+    except IntegrityError:
+        await db.rollback()
+
+    # Una reserva sin respuesta más vieja que `idempotency_lock_seconds` es de una petición que
+    # murió a medias: se toma de nuevo.
+    lock_expired_before = now - timedelta(seconds=settings.idempotency_lock_seconds)
+    taken = await db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.scope == key_scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+            IdempotencyKey.created_at < lock_expired_before,
+        )
+        .values(created_at=now)
+    )
+    await db.commit()
+    if taken.rowcount == 1:
+        return None
+
+    record = await db.get(IdempotencyKey, (key_scope, key))
+    if record is None or record.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A request with this {IDEMPOTENCY_HEADER} is already in progress",
+            headers={"Retry-After": "1"},
+        )
+
+    if record.fingerprint is not None and record.fingerprint != await _request_fingerprint(request):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{IDEMPOTENCY_HEADER} was already used with a different request payload",
+        )
+
+    headers = {**(record.response_headers or {}), "Idempotent-Replayed": "true"}
+    return Response(
+        content=orjson.dumps(record.response_body),
+        status_code=record.status_code,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+async def store_idempotent_response(
+    db: AsyncSession,
+    request: Request,
+    key: str,
+    status_code: int,
+    body: Any,
+    headers: dict[str, str] | None = None,
+) -> None:
+    """Guarda la respuesta en la transacción del llamador, junto con los datos que produce."""
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.scope == _key_scope(request), IdempotencyKey.key == key)
+        .values(
+            fingerprint=await _request_fingerprint(request),
+            status_code=status_code,
+            response_body=body,
+            response_headers=headers,
+        )
+    )
+
+
+async def release_idempotency_key(db: AsyncSession, request: Request, key: str) -> None:
+    """Libera la reserva cuando la petición falla, para que el reintento pueda procesarse."""
+    await db.rollback()
+    await db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.scope == _key_scope(request),
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+        )
+    )
+    await db.commit()
@@ -0,0 +1,40 @@
+import base64
+import binascii
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+
+def _encode(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> tuple[str, int]:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    key, _, item_id = raw.rpartition("|")
+    return key, int(item_id)
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    return _encode(f"{created_at.isoformat()}|{item_id}")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, item_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), item_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def encode_rank_cursor(score: float, item_id: int) -> str:
+    # repr() conserva el float exacto: la página siguiente compara contra el mismo valor.
+    return _encode(f"{score!r}|{item_id}")
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        score, item_id = _decode(cursor)
+        return float(score), item_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import create_access_token, hash_password, verify_password
+from app.api.throttling import throttle_login, throttle_register
+from app.core.security import create_access_token, hash_password, verify_and_update_password
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.auth import Token
@@ -12,32 +13,48 @@ from app.schemas.user import UserCreate, UserOut
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def register(payload: UserCreate, db: Session = Depends(get_db)) -> User:
-    if db.scalar(select(User).where(User.email == payload.email)):
+@router.post(
+    "/register",
+    response_model=UserOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(throttle_register)],
+)
+async def register(payload: UserCreate, db: AsyncSession = Depends(get_db)) -> User:
+    if await db.scalar(select(User).where(User.email == payload.email)):
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already exists")
-    if db.scalar(select(User).where(User.username == payload.username)):
+    if await db.scalar(select(User).where(User.username == payload.username)):
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already exists")
 
     user = User(
         email=payload.email,
         username=payload.username,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await hash_password(payload.password),
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
-@router.post("/token", response_model=Token)
-def login_for_access_token(
+@router.post("/token", response_model=Token, dependencies=[Depends(throttle_login)])
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Token:
-    user = db.scalar(select(User).where(User.email == form_data.username))
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    token = create_access_token(subject=str(user.id))
+    is_valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not is_valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        # passlib marcó el hash como obsoleto (esquema o rondas viejas): se actualiza en el login.
+        user.hashed_password = new_hash
+        await db.commit()
+
+    token = create_access_token(
+        subject=str(user.id),
+        extra_claims={"username": user.username, "ver": user.token_version},
+    )
     return Token(access_token=token)
@@ -1,68 +1,95 @@
-import base64
-import binascii
-import mimetypes
+import asyncio
 import re
 from pathlib import Path
-from urllib.error import URLError
 from urllib.parse import parse_qs, urlparse
-from urllib.request import Request as UrlRequest, urlopen
-from typing import Any
-from uuid import uuid4
+from typing import Any, Awaitable, Callable
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+import httpx
+import orjson
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Request, Response, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import require_n8n_api_key
+from app.api.feed import publish_created_posts
+from app.api.idempotency import (
+    IDEMPOTENCY_HEADER,
+    claim_idempotency_key,
+    release_idempotency_key,
+    store_idempotent_response,
+)
+from app.api.throttling import throttle_n8n
+from app.core.cache import feed_cache
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.image_pipeline import enqueue_image_variants
+from app.core.job_queue import complete_job, enqueue_job, register_job_handler, wake_job_workers
+from app.core.json_stream import JSONObjectStream
+from app.core.media import CHUNK_SIZE, Base64MediaWriter, MediaWriter, save_base64, save_file, save_path
 from app.db.session import get_db
+from app.models.automation import Job
 from app.models.post import Post
 from app.models.user import User
-from app.schemas.automation import N8NPostCreate
-from app.schemas.post import PostOut
+from app.schemas.automation import AutomationJobOut, N8NBulkItemResult, N8NBulkResult, N8NPostCreate
+from app.schemas.post import PostAuthor, PostOut
 
 router = APIRouter(prefix="/automation", tags=["automation"])
 
+N8N_POST_JOB = "n8n_post"
 
-def _normalize_external_image_url(value: str | None) -> str | None:
+
+async def _normalize_external_image_url(value: str | None) -> str | None:
     if value is None:
         return None
     normalized = value.strip()
     if not normalized:
         return None
     if normalized.startswith(("http://", "https://")):
-        return _download_external_image(_normalize_google_drive_url(normalized))
+        return await _download_external_image(_normalize_google_drive_url(normalized))
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="image_url must be a valid http(s) URL")
 
 
-def _download_external_image(url: str) -> str:
-    request = UrlRequest(url, headers={"User-Agent": "miniface-bot/1.0"})
-
+async def _download_external_image(url: str) -> str:
     try:
-        with urlopen(request, timeout=20) as response:
-            mime_type = response.headers.get_content_type()
+        async with get_http_client().stream("GET", url) as response:
+            if response.is_error:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="image_url could not be fetched",
+                )
+
+            mime_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
             if not mime_type.startswith("image/"):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="image_url must point to an image",
                 )
 
-            image_bytes = response.read()
-    except HTTPException:
-        raise
-    except (URLError, TimeoutError) as exc:
+            content_length = response.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) > settings.media_max_upload_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="image_url exceeds the maximum image size",
+                )
+
+            # Escrituras de 64 KiB al page cache: no vale la pena un salto al threadpool por bloque.
+            with MediaWriter() as writer:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    writer.write(chunk)
+                return writer.commit()
+    except httpx.TooManyRedirects as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="image_url has too many redirects",
+        ) from exc
+    except httpx.HTTPError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="image_url could not be fetched",
         ) from exc
 
-    if not image_bytes:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="image_url is empty")
-
-    parsed_url = urlparse(url)
-    candidate_name = Path(parsed_url.path).name if parsed_url.path else None
-    return _save_binary_image(image_bytes, filename=candidate_name, mime_type=mime_type)
-
 
 def _extract_google_drive_file_id(parsed_url) -> str | None:
     query_id = parse_qs(parsed_url.query).get("id", [None])[0]
@@ -89,84 +116,7 @@ def _normalize_google_drive_url(url: str) -> str:
     return f"https://drive.google.com/uc?export=view&id={file_id}"
 
 
-def _save_upload_image(image: UploadFile) -> str:
-    if not image.content_type or not image.content_type.startswith("image/"):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be an image")
-
-    upload_dir = Path(settings.media_dir)
-    upload_dir.mkdir(parents=True, exist_ok=True)
-
-    ext = Path(image.filename or "").suffix or ".jpg"
-    file_name = f"{uuid4().hex}{ext}"
-    file_path = upload_dir / file_name
-
-    with file_path.open("wb") as buffer:
-        buffer.write(image.file.read())
-
-    return f"/{settings.media_dir}/{file_name}"
-
-
-def _save_binary_image(content: bytes, filename: str | None = None, mime_type: str | None = None) -> str:
-    upload_dir = Path(settings.media_dir)
-    upload_dir.mkdir(parents=True, exist_ok=True)
-
-    ext = Path(filename or "").suffix
-    if not ext and mime_type:
-        guessed_ext = mimetypes.guess_extension(mime_type)
-        if guessed_ext:
-            ext = guessed_ext
-    if not ext:
-        ext = ".jpg"
-
-    file_name = f"{uuid4().hex}{ext}"
-    file_path = upload_dir / file_name
-    file_path.write_bytes(content)
-
-    return f"/{settings.media_dir}/{file_name}"
-
-
-def _decode_base64_image(image_base64: str) -> tuple[bytes, str | None]:
-    raw_data = image_base64.strip()
-    mime_type = None
-
-    if raw_data.startswith("data:"):
-        header, _, encoded = raw_data.partition(",")
-        if not encoded:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image_base64 data URL")
-        raw_data = encoded
-        if ";base64" in header:
-            mime_type = header[5:].split(";")[0] or None
-
-    raw_data = re.sub(r"\s+", "", raw_data)
-    raw_data = raw_data.replace("-", "+").replace("_", "/")
-    raw_data += "=" * (-len(raw_data) % 4)
-
-    try:
-        image_bytes = base64.b64decode(raw_data, validate=True)
-    except (binascii.Error, ValueError) as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image_base64 payload") from exc
-
-    if not image_bytes:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="image_base64 is empty")
-
-    return image_bytes, mime_type
-
-
-def _build_filename_from_binary_meta(binary_meta: dict[str, Any]) -> str | None:
-    file_name = binary_meta.get("fileName")
-    if isinstance(file_name, str) and file_name.strip():
-        return file_name.strip()
-
-    file_extension = binary_meta.get("fileExtension")
-    if isinstance(file_extension, str) and file_extension.strip():
-        normalized_ext = file_extension.strip().lstrip(".")
-        if normalized_ext:
-            return f"image.{normalized_ext}"
-
-    return None
-
-
-def _read_binary_from_n8n_filesystem(binary_id: str) -> bytes | None:
+def _find_n8n_binary_file(binary_id: str) -> Path | None:
     if not binary_id.startswith("filesystem-v2:"):
         return None
 
@@ -184,25 +134,25 @@ def _read_binary_from_n8n_filesystem(binary_id: str) -> bytes | None:
 
     for file_path in candidate_paths:
         if file_path.is_file():
-            return file_path.read_bytes()
+            return file_path
 
     return None
 
 
-def _extract_n8n_binary_image(binary_meta: dict[str, Any]) -> tuple[bytes, str | None, str | None]:
-    filename = _build_filename_from_binary_meta(binary_meta)
-    mime_type = binary_meta.get("mimeType") if isinstance(binary_meta.get("mimeType"), str) else None
-
+def _save_n8n_binary_image(binary_meta: dict[str, Any]) -> str:
     data = binary_meta.get("data")
     if isinstance(data, str) and data.strip():
-        image_bytes, detected_mime_type = _decode_base64_image(data)
-        return image_bytes, filename, mime_type or detected_mime_type
+        return save_base64(data)
 
     binary_id = binary_meta.get("id")
     if isinstance(binary_id, str) and binary_id.strip():
-        image_bytes = _read_binary_from_n8n_filesystem(binary_id)
-        if image_bytes:
-            return image_bytes, filename, mime_type
+        file_path = _find_n8n_binary_file(binary_id)
+        if file_path is not None:
+            try:
+                return save_path(file_path, allow_link=settings.n8n_binary_hardlink)
+            except FileNotFoundError:
+                # n8n borró el binario entre la búsqueda y la lectura.
+                pass
 
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
@@ -213,67 +163,389 @@ def _extract_n8n_binary_image(binary_meta: dict[str, Any]) -> tuple[bytes, str |
     )
 
 
-@router.post("/n8n/posts", response_model=PostOut, status_code=status.HTTP_201_CREATED)
-@router.post("/n8n/post", response_model=PostOut, status_code=status.HTTP_201_CREATED, include_in_schema=False)
+async def _save_payload_image(payload: N8NPostCreate, fallback_url: str | None = None) -> str | None:
+    if payload.image_base64:
+        return await run_in_threadpool(save_base64, payload.image_base64)
+    if payload.image_binary:
+        return await run_in_threadpool(_save_n8n_binary_image, payload.image_binary)
+    return await _normalize_external_image_url(
+        payload.image_url
+        or payload.webContentLink
+        or payload.webViewLink
+        or payload.thumbnailLink
+        or fallback_url
+    )
+
+
+# Rutas JSON cuyo base64 se decodifica al vuelo mientras llega el body, en orden de prioridad.
+_STREAMED_IMAGE_FIELDS: tuple[tuple[str, ...], ...] = (("image_base64",), ("image_binary", "data"))
+
+
+async def _read_json_payload(request: Request) -> tuple[Any, str | None]:
+    """Lee el body JSON por bloques; devuelve el documento sin los campos base64 y la imagen guardada."""
+    writers: dict[tuple[str, ...], Base64MediaWriter] = {}
+
+    def sink_for(path: tuple[str, ...]):
+        def open_sink():
+            writer = writers.pop(path, None)
+            if writer is not None:
+                # Clave repetida: gana la última, como en `json.loads`.
+                writer.abort()
+            writers[path] = Base64MediaWriter()
+            return writers[path].feed
+
+        return open_sink
+
+    parser = JSONObjectStream(
+        {path: sink_for(path) for path in _STREAMED_IMAGE_FIELDS},
+        max_buffered_bytes=settings.n8n_json_max_buffered_bytes,
+        max_depth=settings.n8n_json_max_depth,
+    )
+    try:
+        async for chunk in request.stream():
+            parser.feed(chunk)
+        document = parser.close()
+
+        stored_image_url = None
+        for path in _STREAMED_IMAGE_FIELDS:
+            writer = writers.get(path)
+            # Un string vacío cuenta como ausente, igual que en `_save_payload_image`.
+            if writer is not None and writer.received and stored_image_url is None:
+                stored_image_url = writer.commit()
+        return document, stored_image_url
+    finally:
+        # Tras `commit()` el temporal ya no existe y `abort()` no hace nada.
+        for writer in writers.values():
+            writer.abort()
+
+
+async def _read_bulk_body(request: Request) -> bytes:
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Body exceeds {settings.n8n_bulk_max_body_bytes} bytes",
+    )
+    # Content-Length se revisa antes de leer nada; sin él (chunked) o si miente, corta el conteo.
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.n8n_bulk_max_body_bytes:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.n8n_bulk_max_body_bytes:
+            raise too_large
+    return bytes(body)
+
+
+def _parse_bulk_items(body: bytes, content_type: str) -> list[Any]:
+    try:
+        if content_type.startswith(("application/x-ndjson", "application/jsonl")):
+            return [orjson.loads(line) for line in body.splitlines() if line.strip()]
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body") from exc
+
+    if isinstance(data, dict) and isinstance(data.get("items"), list):
+        return data["items"]
+    if isinstance(data, list):
+        return data
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Body must be a JSON array, {\"items\": [...]} or NDJSON",
+    )
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+
+
+async def _resolve_author_id(db: AsyncSession, author_email: str | None) -> int:
+    target_email = author_email or settings.n8n_default_author_email
+    if not target_email:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="author_email is required when N8N_DEFAULT_AUTHOR_EMAIL is not configured",
+        )
+
+    owner_id = await db.scalar(select(User.id).where(User.email == target_email))
+    if owner_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Author user not found")
+    return owner_id
+
+
+async def _create_n8n_post(
+    db: AsyncSession,
+    content: str,
+    owner_id: int,
+    image_url_value: str | None,
+    on_flush: Callable[[PostOut], Awaitable[None]] | None = None,
+) -> PostOut:
+    post = Post(content=content, image_url=image_url_value, owner_id=owner_id)
+    db.add(post)
+    await db.flush()
+    # Mismo formato que `POST /api/posts`: el post con su autor.
+    author = (await db.execute(select(User.id, User.username, User.avatar_url).where(User.id == owner_id))).one()
+    post_out = PostOut.model_validate(post).model_copy(update={"author": PostAuthor.model_validate(author._mapping)})
+    if on_flush is not None:
+        # Misma transacción que el post (respuesta idempotente, estado del job): o quedan ambos o ninguno.
+        await on_flush(post_out)
+    await db.commit()
+    await feed_cache.invalidate()
+    enqueue_image_variants(image_url_value)
+    await publish_created_posts(db, [post.id])
+    return post_out
+
+
+def _store_post_response(
+    db: AsyncSession, request: Request, idempotency_key: str
+) -> Callable[[PostOut], Awaitable[None]]:
+    async def store_response(post_out: PostOut) -> None:
+        body = post_out.model_dump(mode="json")
+        await store_idempotent_response(db, request, idempotency_key, status.HTTP_201_CREATED, body)
+
+    return store_response
+
+
+async def _process_n8n_post_job(db: AsyncSession, job: Job) -> dict[str, Any]:
+    payload = job.payload
+    parsed_payload = N8NPostCreate.model_validate(payload["post"])
+    image_url_value = payload.get("stored_image_url") or await _save_payload_image(
+        parsed_payload, payload.get("fallback_image")
+    )
+    result: dict[str, Any] = {}
+
+    async def mark_job_done(post_out: PostOut) -> None:
+        result.update(post_out.model_dump(mode="json"))
+        await complete_job(db, job.id, result)
+
+    await _create_n8n_post(db, parsed_payload.content, payload["owner_id"], image_url_value, mark_job_done)
+    return result
+
+
+register_job_handler(N8N_POST_JOB, _process_n8n_post_job)
+
+
+@router.post(
+    "/n8n/posts",
+    response_model=PostOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(throttle_n8n)],
+)
+@router.post(
+    "/n8n/post",
+    response_model=PostOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(throttle_n8n)],
+    include_in_schema=False,
+)
 async def create_post_from_n8n(
     request: Request,
     content: str | None = Form(default=None, min_length=1, max_length=2000),
     image: UploadFile | None = File(default=None),
     image_url: str | None = Form(default=None),
     author_email: str | None = Form(default=None),
+    idempotency_key: str | None = Header(default=None, alias=IDEMPOTENCY_HEADER),
+    prefer: str | None = Header(default=None),
     _: None = Depends(require_n8n_api_key),
-    db: Session = Depends(get_db),
-) -> Post:
-    payload_content = content
-    payload_author_email = author_email
-    image_url_value = _save_upload_image(image) if image else _normalize_external_image_url(image_url)
-
-    if payload_content is None:
-        raw_json = await request.json() if request.headers.get("content-type", "").startswith("application/json") else {}
-        if raw_json:
-            parsed_payload = N8NPostCreate.model_validate(raw_json)
-            payload_content = parsed_payload.content
-            payload_author_email = parsed_payload.author_email
-
-            if parsed_payload.image_base64:
-                image_bytes, mime_type = _decode_base64_image(parsed_payload.image_base64)
-                image_url_value = _save_binary_image(
-                    image_bytes,
-                    filename=parsed_payload.image_filename,
-                    mime_type=mime_type,
-                )
-            elif parsed_payload.image_binary:
-                image_bytes, filename, mime_type = _extract_n8n_binary_image(parsed_payload.image_binary)
-                image_url_value = _save_binary_image(
-                    image_bytes,
-                    filename=parsed_payload.image_filename or filename,
-                    mime_type=mime_type,
-                )
-            else:
-                image_url_value = _normalize_external_image_url(
-                    parsed_payload.image_url
-                    or parsed_payload.webContentLink
-                    or parsed_payload.webViewLink
-                    or parsed_payload.thumbnailLink
-                    or raw_json.get("image")
-                )
+    db: AsyncSession = Depends(get_db),
+) -> PostOut | Response:
+    if idempotency_key is not None:
+        replay = await claim_idempotency_key(db, request, idempotency_key)
+        if replay is not None:
+            return replay
 
-    if payload_content is None:
-        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Field required: content")
+    try:
+        payload_content = content
+        payload_author_email = author_email
+        parsed_payload: N8NPostCreate | None = None
+        raw_json: Any = {}
+        stored_image_url: str | None = None
+        if payload_content is None and request.headers.get("content-type", "").startswith("application/json"):
+            raw_json, stored_image_url = await _read_json_payload(request)
+            if raw_json or stored_image_url:
+                try:
+                    parsed_payload = N8NPostCreate.model_validate(raw_json)
+                except ValidationError as exc:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail=_validation_message(exc),
+                    ) from exc
+                payload_content = parsed_payload.content
+                payload_author_email = parsed_payload.author_email
+
+        if payload_content is None:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Field required: content")
+
+        owner_id = await _resolve_author_id(db, payload_author_email)
+
+        # `Prefer: respond-async` (RFC 7240): la descarga/decodificación de la imagen y el INSERT
+        # pasan a la cola durable. Un archivo subido por multipart se procesa siempre en línea.
+        if image is None and "respond-async" in (prefer or "").lower():
+            post_payload = parsed_payload or N8NPostCreate(
+                content=payload_content, image_url=image_url, author_email=author_email
+            )
+            job = enqueue_job(
+                db,
+                N8N_POST_JOB,
+                {
+                    "post": post_payload.model_dump(exclude_none=True),
+                    "owner_id": owner_id,
+                    "fallback_image": raw_json.get("image"),
+                    "stored_image_url": stored_image_url,
+                },
+            )
+            await db.flush()
+            body = AutomationJobOut.model_validate(job).model_dump(mode="json")
+            headers = {"Location": request.app.url_path_for("get_n8n_job", job_id=str(job.id))}
+            if idempotency_key is not None:
+                await store_idempotent_response(db, request, idempotency_key, status.HTTP_202_ACCEPTED, body, headers)
+            await db.commit()
+            wake_job_workers()
+            return Response(
+                content=orjson.dumps(body),
+                status_code=status.HTTP_202_ACCEPTED,
+                media_type="application/json",
+                headers=headers,
+            )
+
+        if image:
+            image_url_value = await run_in_threadpool(save_file, image.file)
+        elif stored_image_url is not None:
+            image_url_value = stored_image_url
+        elif parsed_payload is not None:
+            image_url_value = await _save_payload_image(parsed_payload, raw_json.get("image"))
+        else:
+            image_url_value = await _normalize_external_image_url(image_url)
+
+        store_response = None if idempotency_key is None else _store_post_response(db, request, idempotency_key)
+        return await _create_n8n_post(db, payload_content, owner_id, image_url_value, store_response)
+    except Exception:
+        if idempotency_key is not None:
+            await release_idempotency_key(db, request, idempotency_key)
+        raise
 
-    target_email = payload_author_email or settings.n8n_default_author_email
-    if not target_email:
+
+@router.get("/n8n/jobs/{job_id}", response_model=AutomationJobOut)
+async def get_n8n_job(
+    job_id: int,
+    _: None = Depends(require_n8n_api_key),
+    db: AsyncSession = Depends(get_db),
+) -> Job:
+    job = await db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.post("/n8n/posts/bulk", response_model=N8NBulkResult, dependencies=[Depends(throttle_n8n)])
+async def create_posts_from_n8n_bulk(
+    request: Request,
+    idempotency_key: str | None = Header(default=None, alias=IDEMPOTENCY_HEADER),
+    _: None = Depends(require_n8n_api_key),
+    db: AsyncSession = Depends(get_db),
+) -> N8NBulkResult | Response:
+    if idempotency_key is not None:
+        replay = await claim_idempotency_key(db, request, idempotency_key)
+        if replay is not None:
+            return replay
+
+    try:
+        raw_items = _parse_bulk_items(await _read_bulk_body(request), request.headers.get("content-type", ""))
+        return await _create_posts_bulk(db, request, raw_items, idempotency_key)
+    except Exception:
+        if idempotency_key is not None:
+            await release_idempotency_key(db, request, idempotency_key)
+        raise
+
+
+async def _create_posts_bulk(
+    db: AsyncSession, request: Request, raw_items: list[Any], idempotency_key: str | None
+) -> N8NBulkResult:
+    if len(raw_items) > settings.n8n_bulk_max_items:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="author_email is required when N8N_DEFAULT_AUTHOR_EMAIL is not configured",
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.n8n_bulk_max_items} items per request",
         )
 
-    user = db.scalar(select(User).where(User.email == target_email))
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Author user not found")
-
-    post = Post(content=payload_content, image_url=image_url_value, owner_id=user.id)
-    db.add(post)
-    db.commit()
-    db.refresh(post)
-    return post
+    results: dict[int, N8NBulkItemResult] = {}
+    pending: dict[int, tuple[N8NPostCreate, str, Any]] = {}
+    for index, raw_item in enumerate(raw_items):
+        if not isinstance(raw_item, dict):
+            results[index] = N8NBulkItemResult(index=index, ok=False, error="Item must be a JSON object")
+            continue
+        try:
+            payload = N8NPostCreate.model_validate(raw_item)
+        except ValidationError as exc:
+            results[index] = N8NBulkItemResult(index=index, ok=False, error=_validation_message(exc))
+            continue
+        target_email = payload.author_email or settings.n8n_default_author_email
+        if not target_email:
+            results[index] = N8NBulkItemResult(
+                index=index,
+                ok=False,
+                error="author_email is required when N8N_DEFAULT_AUTHOR_EMAIL is not configured",
+            )
+            continue
+        pending[index] = (payload, target_email, raw_item.get("image"))
+
+    # Un solo SELECT para todos los autores del lote.
+    emails = {target_email for _, target_email, _ in pending.values()}
+    authors: dict[str, PostAuthor] = {}
+    if emails:
+        author_rows = await db.execute(
+            select(User.email, User.id, User.username, User.avatar_url).where(User.email.in_(emails))
+        )
+        authors = {row.email: PostAuthor.model_validate(row._mapping) for row in author_rows}
+
+    semaphore = asyncio.Semaphore(settings.n8n_bulk_concurrency)
+
+    async def resolve_image(index: int, payload: N8NPostCreate, fallback_url: Any) -> tuple[int, str | None, str | None]:
+        async with semaphore:
+            try:
+                return index, await _save_payload_image(payload, fallback_url), None
+            except HTTPException as exc:
+                return index, None, str(exc.detail)
+
+    image_jobs = []
+    for index, (payload, target_email, fallback_url) in pending.items():
+        if target_email not in authors:
+            results[index] = N8NBulkItemResult(index=index, ok=False, error="Author user not found")
+            continue
+        image_jobs.append(resolve_image(index, payload, fallback_url))
+
+    rows: list[dict[str, Any]] = []
+    row_indexes: list[int] = []
+    row_authors: list[PostAuthor] = []
+    for index, image_url_value, error in await asyncio.gather(*image_jobs):
+        if error is not None:
+            results[index] = N8NBulkItemResult(index=index, ok=False, error=error)
+            continue
+        payload, target_email, _ = pending[index]
+        author = authors[target_email]
+        rows.append({"content": payload.content, "image_url": image_url_value, "owner_id": author.id})
+        row_indexes.append(index)
+        row_authors.append(author)
+
+    if rows:
+        # INSERT multi-fila (insertmanyvalues) con RETURNING en el mismo orden que `rows`: cada post
+        # se empareja con su item por posición, aunque el lote tenga items idénticos.
+        posts = (await db.scalars(insert(Post).returning(Post, sort_by_parameter_order=True), rows)).all()
+        for index, author, post in zip(row_indexes, row_authors, posts, strict=True):
+            post_out = PostOut.model_validate(post).model_copy(update={"author": author})
+            results[index] = N8NBulkItemResult(index=index, ok=True, post=post_out)
+
+    ordered_results = [results[index] for index in range(len(raw_items))]
+    created = sum(1 for result in ordered_results if result.ok)
+    bulk_result = N8NBulkResult(created=created, failed=len(ordered_results) - created, results=ordered_results)
+    if idempotency_key is not None:
+        await store_idempotent_response(
+            db, request, idempotency_key, status.HTTP_200_OK, bulk_result.model_dump(mode="json")
+        )
+    await db.commit()
+
+    if rows:
+        await feed_cache.invalidate()
+        for row in rows:
+            enqueue_image_variants(row["image_url"])
+        await publish_created_posts(db, [post.id for post in posts])
+    return bulk_result
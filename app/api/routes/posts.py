@@ -1,75 +1,191 @@
-from pathlib import Path
-from uuid import uuid4
+import asyncio
+from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import get_current_user
+from app.api.feed import (
+    feed_item,
+    feed_response,
+    page_body,
+    page_etag,
+    publish_created_posts,
+    publish_deleted_post,
+    select_feed,
+)
+from app.api.pagination import decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor
+from app.core.cache import feed_cache
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.events import event_broker
+from app.core.image_pipeline import enqueue_image_variants
+from app.core.media import save_file
+from app.core.media_sweeper import queue_media_deletion
+from app.db.routing import use_primary
+from app.db.search import search_matches
+from app.db.session import get_db, get_read_db, is_replica
 from app.models.post import Post
-from app.models.user import User
-from app.schemas.post import PostOut
+from app.schemas.post import PostAuthor, PostOut, PostPage
+from app.schemas.user import CurrentUser
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
 
 @router.post("", response_model=PostOut, status_code=status.HTTP_201_CREATED)
-def create_post(
+async def create_post(
     content: str = Form(...),
     image: UploadFile | None = File(default=None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> Post:
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+) -> PostOut:
     image_url = None
 
     if image:
-        if not image.content_type or not image.content_type.startswith("image/"):
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be an image")
-
-        upload_dir = Path(settings.media_dir)
-        upload_dir.mkdir(parents=True, exist_ok=True)
-
-        ext = Path(image.filename or "").suffix or ".jpg"
-        file_name = f"{uuid4().hex}{ext}"
-        file_path = upload_dir / file_name
-
-        with file_path.open("wb") as buffer:
-            buffer.write(image.file.read())
-
-        image_url = f"/{settings.media_dir}/{file_name}"
+        image_url = await run_in_threadpool(save_file, image.file)
 
     post = Post(content=content, image_url=image_url, owner_id=current_user.id)
     db.add(post)
-    db.commit()
-    db.refresh(post)
-    return post
-
-
-@router.get("", response_model=list[PostOut])
-def list_posts(db: Session = Depends(get_db)) -> list[Post]:
-    return list(db.scalars(select(Post).order_by(Post.created_at.desc())))
+    await db.commit()
+    await feed_cache.invalidate()
+    enqueue_image_variants(image_url)
+    await db.refresh(post)
+    await publish_created_posts(db, [post.id])
+    author = PostAuthor(id=current_user.id, username=current_user.username, avatar_url=current_user.avatar_url)
+    return PostOut.model_validate(post).model_copy(update={"author": author})
+
+
+@router.get("", response_model=PostPage)
+async def list_posts(
+    limit: int = Query(default=settings.feed_page_size, ge=1, le=settings.feed_max_page_size),
+    cursor: str | None = Query(default=None),
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    # Lecturas del primario (el cliente acaba de escribir): no se sirven de la caché compartida ni la rellenan.
+    cacheable = not use_primary()
+    cache_key = feed_cache.page_key(limit, cursor)
+    cached = feed_cache.get(cache_key) if cacheable else None
+    if cached is not None:
+        return feed_response(*cached, if_none_match)
+
+    query = select_feed().order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1)
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        query = query.where(tuple_(Post.created_at, Post.id) < tuple_(created_at, post_id))
+
+    rows = (await db.execute(query)).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+    body = page_body([feed_item(row) for row in rows], next_cursor)
+    etag = page_etag(body)
+    if cacheable:
+        feed_cache.set(cache_key, body, etag, from_replica=is_replica(db))
+    return feed_response(body, etag, if_none_match)
+
+
+@router.get("/search", response_model=PostPage)
+async def search_posts(
+    q: str = Query(min_length=1, max_length=settings.search_max_query_length),
+    limit: int = Query(default=settings.feed_page_size, ge=1, le=settings.feed_max_page_size),
+    cursor: str | None = Query(default=None),
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    matches = search_matches(db.bind.dialect.name, q)
+    if matches is None:
+        body = page_body([], None)
+        return feed_response(body, page_etag(body), if_none_match)
+
+    # Orden por relevancia y desempate por id: la paginación es keyset sobre (score, id).
+    query = (
+        select_feed(matches.c.score)
+        .join(matches, matches.c.id == Post.id)
+        .order_by(matches.c.score.desc(), Post.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        score, post_id = decode_rank_cursor(cursor)
+        query = query.where(tuple_(matches.c.score, Post.id) < tuple_(score, post_id))
+
+    rows = (await db.execute(query)).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_rank_cursor(rows[-1]["score"], rows[-1]["id"])
+
+    body = page_body([feed_item(row) for row in rows], next_cursor)
+    return feed_response(body, page_etag(body), if_none_match)
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_posts() -> StreamingResponse:
+    """Server-Sent Events con `post.created` y `post.deleted`.
+
+    Cada cliente conectado es una conexión ociosa esperando su cola; no consulta la DB.
+    """
+    if not event_broker.accepting:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is shutting down",
+            headers={"Retry-After": "1"},
+        )
+    if event_broker.is_full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live feed connections",
+            headers={"Retry-After": "5"},
+        )
+
+    async def events() -> AsyncIterator[bytes]:
+        # La suscripción vive dentro del generador: si el cliente se va, el finally la libera.
+        queue = event_broker.subscribe()
+        try:
+            yield f"retry: {settings.events_retry_ms}\n\n".encode()
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), timeout=settings.events_keepalive_seconds)
+                except asyncio.TimeoutError:
+                    # Comentario SSE: mantiene viva la conexión a través de proxies.
+                    yield b": keepalive\n\n"
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            event_broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
-def delete_post(
+async def delete_post(
     post_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> Response:
-    post = db.get(Post, post_id)
+    post = await db.get(Post, post_id)
     if post is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
     if post.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
 
-    if post.image_url:
-        image_relative = post.image_url.lstrip("/")
-        image_path = Path(image_relative)
-        if image_path.exists() and image_path.is_file():
-            image_path.unlink(missing_ok=True)
-
-    db.delete(post)
-    db.commit()
+    image_url = post.image_url
+    await db.delete(post)
+    if image_url:
+        # El archivo puede estar compartido con otros posts o con un upload en curso: lo borra el
+        # barrido de media si sigue sin referencias.
+        await queue_media_deletion(db, image_url)
+    await db.commit()
+    await feed_cache.invalidate()
+    await publish_deleted_post(post_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,12 +1,64 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
+from app.api.feed import feed_item, feed_response, page_body, page_etag, select_feed
+from app.api.pagination import decode_cursor, encode_cursor
+from app.core.cache import feed_cache
+from app.core.config import settings
+from app.db.routing import use_primary
+from app.db.session import get_read_db, is_replica
+from app.models.post import Post
 from app.models.user import User
-from app.schemas.user import UserOut
+from app.schemas.post import PostPage
+from app.schemas.user import CurrentUser, UserOut
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/me", response_model=UserOut)
-def get_me(current_user: User = Depends(get_current_user)) -> User:
+async def get_me(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     return current_user
+
+
+@router.get("/{user_id}/posts", response_model=PostPage)
+async def list_user_posts(
+    user_id: int,
+    limit: int = Query(default=settings.feed_page_size, ge=1, le=settings.feed_max_page_size),
+    cursor: str | None = Query(default=None),
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    # Lecturas del primario (el cliente acaba de escribir): no se sirven de la caché compartida ni la rellenan.
+    cacheable = not use_primary()
+    cache_key = feed_cache.page_key(limit, cursor, scope=f"user:{user_id}")
+    cached = feed_cache.get(cache_key) if cacheable else None
+    if cached is not None:
+        return feed_response(*cached, if_none_match)
+
+    # Filtra por el índice de owner_id; el JOIN trae al autor en la misma consulta.
+    query = (
+        select_feed()
+        .where(Post.owner_id == user_id)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        query = query.where(tuple_(Post.created_at, Post.id) < tuple_(created_at, post_id))
+
+    rows = (await db.execute(query)).mappings().all()
+    if not rows and cursor is None and await db.get(User, user_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+    body = page_body([feed_item(row) for row in rows], next_cursor)
+    etag = page_etag(body)
+    if cacheable:
+        feed_cache.set(cache_key, body, etag, from_replica=is_replica(db))
+    return feed_response(body, etag, if_none_match)
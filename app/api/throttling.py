@@ -0,0 +1,48 @@
+import hashlib
+from typing import AsyncIterator
+
+from fastapi import Depends, Header, Request
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.api.deps import require_n8n_api_key
+from app.core.config import settings
+from app.core.rate_limit import LOGIN_ACCOUNT, LOGIN_IP, N8N_KEY, REGISTER_IP, expensive_gate, rate_limiter
+
+# Dependencias (con yield) de las rutas caras: primero los rate limits, que son baratos, y después
+# un lugar en la compuerta de concurrencia, que se ocupa mientras corre el endpoint.
+
+
+def client_ip(request: Request) -> str:
+    if settings.trusted_proxy_hops > 0:
+        # Cada proxy agrega la IP de quien le habló: la entrada que dejó el primero de los nuestros
+        # es la del cliente; lo que esté más a la izquierda lo controla el cliente.
+        forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+        if len(forwarded) >= settings.trusted_proxy_hops:
+            return forwarded[-settings.trusted_proxy_hops]
+    return request.client.host if request.client else "unknown"
+
+
+async def throttle_login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+) -> AsyncIterator[None]:
+    await rate_limiter.hit(LOGIN_IP, client_ip(request))
+    await rate_limiter.hit(LOGIN_ACCOUNT, form_data.username.strip().lower())
+    async with expensive_gate.slot():
+        yield
+
+
+async def throttle_register(request: Request) -> AsyncIterator[None]:
+    await rate_limiter.hit(REGISTER_IP, client_ip(request))
+    async with expensive_gate.slot():
+        yield
+
+
+async def throttle_n8n(
+    _: None = Depends(require_n8n_api_key),
+    x_n8n_key: str | None = Header(default=None),
+) -> AsyncIterator[None]:
+    # La clave ya se validó: se limita por su hash para no dejarla en claro en el backend.
+    await rate_limiter.hit(N8N_KEY, hashlib.sha256((x_n8n_key or "").encode()).hexdigest()[:16])
+    async with expensive_gate.slot():
+        yield
@@ -0,0 +1,122 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Protocol
+
+from app.core.config import settings
+from app.core.events import EventBroker, event_broker
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None: ...
+
+    def incr(self, key: str) -> int: ...
+
+
+# LRU en memoria con TTL por entrada. Un backend compartido (ej. Redis) solo necesita
+# implementar `get`, `set` e `incr` para reemplazarlo.
+class InMemoryCache:
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[bytes, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            value = int(entry[0]) + 1 if entry else 1
+            self._entries[key] = (str(value).encode(), None)
+            self._entries.move_to_end(key)
+            return value
+
+
+# Páginas del feed ya serializadas junto con su ETag; se invalidan subiendo un contador de generación.
+# Con un broker distribuido (`EVENTS_BACKEND=postgres`) cada invalidación se avisa a los demás workers,
+# que suben su propia generación; sin él, la caché solo se usa si hay un único worker.
+class FeedCache:
+    generation_key = "feed:generation"
+    invalidated_event = "feed.invalidated"
+
+    def __init__(self, backend: CacheBackend, ttl: float, broker: EventBroker, workers: int) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.broker = broker
+        self.enabled = broker.backend.distributed or workers <= 1
+        self._origin = uuid.uuid4().hex
+        self._invalidated_at = float("-inf")
+        broker.add_handler(self.invalidated_event, self._on_invalidated)
+
+    def generation(self) -> int:
+        value = self.backend.get(self.generation_key)
+        return int(value) if value else 0
+
+    def page_key(self, limit: int, cursor: str | None, scope: str = "all") -> str:
+        # La generación se lee antes de consultar la DB: si una escritura ocurre en medio,
+        # la página se guarda bajo la generación vieja y nunca se vuelve a servir.
+        return f"feed:{self.generation()}:{scope}:{limit}:{cursor or ''}"
+
+    def get(self, key: str) -> tuple[bytes, str] | None:
+        """`(body, etag)` de la página, o None si no está en caché."""
+        if not self.enabled:
+            return None
+        value = self.backend.get(key)
+        if value is None:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return body, etag.decode()
+
+    def set(self, key: str, body: bytes, etag: str, from_replica: bool = False) -> None:
+        if not self.enabled:
+            return
+        # Una réplica puede no tener aún la escritura que invalidó la caché: su página no se guarda
+        # hasta pasado el margen de lag, o la verían atrasada todos los clientes durante el TTL.
+        if from_replica and time.monotonic() - self._invalidated_at < settings.db_read_your_writes_seconds:
+            return
+        self.backend.set(key, etag.encode() + b"\n" + body, self.ttl)
+
+    def _bump(self) -> None:
+        self._invalidated_at = time.monotonic()
+        self.backend.incr(self.generation_key)
+
+    async def invalidate(self) -> None:
+        # Llamar después del commit, igual que la publicación de eventos.
+        self._bump()
+        if self.enabled and self.broker.backend.distributed:
+            await self.broker.publish(self.invalidated_event, {"origin": self._origin})
+
+    def _on_invalidated(self, data: dict[str, Any]) -> None:
+        # El propio worker también recibe su aviso por LISTEN; ya invalidó al escribir.
+        if data.get("origin") != self._origin:
+            self._bump()
+
+
+feed_cache = FeedCache(
+    InMemoryCache(settings.feed_cache_max_entries),
+    ttl=settings.feed_cache_ttl_seconds,
+    broker=event_broker,
+    workers=settings.web_concurrency or 1,
+)
+auth_cache = InMemoryCache(settings.auth_cache_max_entries)
@@ -6,17 +6,131 @@ class Settings(BaseSettings):
     app_name: str = "miniface-api"
     app_version: str = "0.1.0"
 
+    # Runner de producción (`python -m app.server`): workers por defecto = CPUs disponibles del contenedor.
+    host: str = "0.0.0.0"
+    port: int = 8000
+    web_concurrency: int | None = None
+    graceful_timeout_seconds: int = 30
+    # Con `uvicorn app.main:app` cada proceso crea media_dir y las tablas al arrancar; el runner lo hace
+    # una vez antes de levantar los workers y lo desactiva en ellos.
+    prepare_on_startup: bool = True
+    warm_up_on_startup: bool = True
+
     database_url: str
+    # Réplicas de solo lectura (una URL o varias separadas por comas): el feed, la búsqueda y la carga del
+    # usuario autenticado leen de ellas en round robin. Sin valor todo va al primario.
+    database_read_url: str | None = None
+    # Lag tolerado de las réplicas: tras una escritura, las lecturas del mismo cliente (cookie) van al
+    # primario y las páginas leídas de una réplica no se guardan en la caché del feed durante este tiempo.
+    db_read_your_writes_seconds: float = 5.0
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    # El pre-ping agrega un round trip en cada checkout; con `db_pool_recycle_seconds` bajo
+    # el límite de inactividad del servidor suele bastar para descartar conexiones muertas.
+    db_pool_pre_ping: bool = True
 
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 16
+    # TTL de la caché de tokens decodificados y usuarios autenticados; 0 consulta siempre la DB.
+    auth_cache_ttl_seconds: float = 60.0
+    auth_cache_max_entries: int = 4096
 
     media_dir: str = "uploads"
+    media_max_upload_bytes: int = 10 * 1024 * 1024
+    media_cache_max_age: int = 60 * 60 * 24 * 365
+    # "X-Accel-Redirect" (nginx) o "X-Sendfile" (Apache/lighttpd) para delegar la entrega al proxy.
+    media_sendfile_header: str | None = None
+    media_internal_prefix: str = "/_media"
+    # Variantes redimensionadas (thumb/feed) generadas en segundo plano: "webp" o "avif".
+    image_variant_format: str = "webp"
+    image_workers: int = 1
+    image_queue_size: int = 100
+    # Los archivos sin posts se borran en un barrido periódico que vuelve a contar referencias; un archivo
+    # reutilizado por un upload hace menos de `media_delete_grace_seconds` se deja para el siguiente.
+    media_sweep_interval_seconds: float = 60.0
+    media_delete_grace_seconds: int = 600
+    media_sweep_batch: int = 100
+    media_sweep_lock_seconds: int = 300
+
+    feed_page_size: int = 20
+    feed_max_page_size: int = 100
+    feed_cache_ttl_seconds: float = 30.0
+    feed_cache_max_entries: int = 256
+    # Configuración de texto de PostgreSQL para la búsqueda (stemming y stopwords del idioma).
+    search_text_config: str = "spanish"
+    search_max_query_length: int = 200
+
+    # Eventos en vivo del feed (SSE): "memory" (un proceso) o "postgres" (LISTEN/NOTIFY entre workers).
+    events_backend: str = "memory"
+    events_channel: str = "miniface_events"
+    events_queue_size: int = 100
+    events_max_subscribers: int = 1000
+    events_keepalive_seconds: float = 15.0
+    events_retry_ms: int = 3000
+    events_reconnect_seconds: float = 2.0
+
+    # `/metrics` (formato Prometheus); con `metrics_token` exige `Authorization: Bearer <token>`.
+    metrics_token: str | None = None
+    # Perfilado por request (opt-in): con `profile_token`, `X-Profile: <token>` deja un volcado en `profile_dir`.
+    profile_token: str | None = None
+    profile_dir: str = "profiles"
+
+    # Rate limiting por token bucket: `*_per_minute` es la recarga y `*_burst` la capacidad (0 lo desactiva).
+    # Backend "memory" (por proceso) o "database" (tabla `rate_limit_buckets`, compartida entre workers).
+    rate_limit_backend: str = "memory"
+    rate_limit_max_keys: int = 10000
+    rate_limit_purge_interval_seconds: int = 600
+    rate_limit_login_ip_per_minute: float = 30.0
+    rate_limit_login_ip_burst: int = 10
+    rate_limit_login_account_per_minute: float = 10.0
+    rate_limit_login_account_burst: int = 5
+    rate_limit_register_ip_per_minute: float = 5.0
+    rate_limit_register_ip_burst: int = 5
+    rate_limit_n8n_per_minute: float = 600.0
+    rate_limit_n8n_burst: int = 100
+    # Proxies delante de la API que agregan la IP del cliente a X-Forwarded-For (0 = IP de la conexión).
+    trusted_proxy_hops: int = 0
+    # Compuerta de concurrencia de las rutas caras (login, registro, ingesta de n8n): en ejecución + en espera;
+    # el resto, o quien espere más de `expensive_max_wait_seconds`, recibe 503.
+    expensive_max_concurrency: int = 8
+    expensive_max_queue: int = 32
+    expensive_max_wait_seconds: float = 2.0
+
+    http_connect_timeout_seconds: float = 5.0
+    http_read_timeout_seconds: float = 20.0
+    http_max_redirects: int = 5
+    http_max_connections: int = 20
 
     n8n_api_key: str | None = None
     n8n_default_author_email: str | None = None
     n8n_binary_data_root: str | None = None
+    # Los binarios filesystem-v2 se enlazan (hardlink) en media_dir si están en el mismo filesystem;
+    # en otro caso se copian en kernel (copy_file_range/sendfile).
+    n8n_binary_hardlink: bool = True
+    n8n_bulk_max_items: int = 500
+    n8n_bulk_concurrency: int = 8
+    # Tope del body de /n8n/posts/bulk, que se parsea completo en memoria (imágenes base64 incluidas).
+    n8n_bulk_max_body_bytes: int = 32 * 1024 * 1024
+    # Tope del JSON de /n8n/posts sin contar el base64 de la imagen, que se decodifica al vuelo.
+    n8n_json_max_buffered_bytes: int = 1024 * 1024
+    n8n_json_max_depth: int = 32
+
+    # Respuestas guardadas por `Idempotency-Key`; una clave sin respuesta tras `idempotency_lock_seconds`
+    # se considera abandonada y puede reclamarse.
+    idempotency_key_ttl_seconds: int = 60 * 60 * 24
+    idempotency_lock_seconds: int = 120
+    idempotency_purge_interval_seconds: int = 60 * 60
+    # Cola durable (tabla `jobs`) para las publicaciones de n8n con `Prefer: respond-async`.
+    job_workers: int = 2
+    job_poll_seconds: float = 2.0
+    job_claim_batch: int = 10
+    job_max_attempts: int = 3
+    job_lock_seconds: int = 300
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
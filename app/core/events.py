@@ -0,0 +1,203 @@
+import asyncio
+import logging
+from typing import Any, Callable, Protocol
+
+import asyncpg
+import orjson
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[bytes], None]
+EventHandler = Callable[[dict[str, Any]], None]
+
+
+class EventBackend(Protocol):
+    # True si los eventos llegan a otros procesos (hay que publicar aunque aquí no haya suscriptores).
+    distributed: bool
+
+    async def start(self, deliver: Deliver) -> None: ...
+
+    async def publish(self, message: bytes) -> None: ...
+
+    async def stop(self) -> None: ...
+
+
+# Backend por defecto: entrega en el mismo proceso. Con varios workers de uvicorn cada uno solo
+# ve sus propios eventos; para repartirlos entre procesos se usa `PostgresNotifyBackend`.
+class InProcessBackend:
+    distributed = False
+
+    def __init__(self) -> None:
+        self._deliver: Deliver | None = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, message: bytes) -> None:
+        if self._deliver is not None:
+            self._deliver(message)
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+
+class PostgresNotifyBackend:
+    # LISTEN/NOTIFY sobre una conexión asyncpg dedicada (fuera del pool de SQLAlchemy). Cada
+    # worker escucha el canal, así que el propio publicador también recibe sus eventos.
+    distributed = True
+    max_payload_bytes = 7999
+
+    def __init__(self, dsn: str, channel: str) -> None:
+        self.dsn = dsn
+        self.channel = channel
+        self._deliver: Deliver | None = None
+        self._connection = None
+        self._supervisor: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+        self._supervisor = asyncio.create_task(self._listen_forever())
+
+    async def publish(self, message: bytes) -> None:
+        if len(message) > self.max_payload_bytes:
+            # NOTIFY admite hasta 8000 bytes: el evento viaja sin datos y el cliente recarga el feed.
+            event = orjson.loads(message)
+            message = orjson.dumps({"type": event["type"], "data": {"id": event["data"].get("id")}})
+        async with self._lock:
+            connection = self._connection
+            if connection is None or connection.is_closed():
+                raise ConnectionError("LISTEN connection is not available")
+            await connection.execute("SELECT pg_notify($1, $2)", self.channel, message.decode())
+
+    async def stop(self) -> None:
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            await asyncio.gather(self._supervisor, return_exceptions=True)
+            self._supervisor = None
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        if self._deliver is not None:
+            self._deliver(payload.encode())
+
+    async def _listen_forever(self) -> None:
+        while True:
+            closed = asyncio.Event()
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                self._connection.add_termination_listener(lambda _: closed.set())
+                await self._connection.add_listener(self.channel, self._on_notification)
+                await closed.wait()
+                logger.warning("LISTEN connection closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Could not LISTEN on %s", self.channel)
+            await asyncio.sleep(settings.events_reconnect_seconds)
+
+
+class EventBroker:
+    """Pub/sub de eventos del feed: cada suscriptor (una conexión SSE) tiene su propia cola."""
+
+    def __init__(self, backend: EventBackend, queue_size: int, max_subscribers: int) -> None:
+        self.backend = backend
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: set[asyncio.Queue[bytes | None]] = set()
+        self._handlers: dict[str, EventHandler] = {}
+        # False desde que el proceso empieza a apagarse: no se aceptan streams nuevos.
+        self.accepting = True
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def has_listeners(self) -> bool:
+        return self.backend.distributed or bool(self._subscribers)
+
+    def add_handler(self, event_type: str, handler: EventHandler) -> None:
+        """Eventos internos entre workers: se entregan a `handler` y no a los streams SSE."""
+        self._handlers[event_type] = handler
+
+    async def start(self) -> None:
+        await self.backend.start(self._deliver)
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+        self.drain()
+
+    def drain(self) -> None:
+        self.accepting = False
+        for queue in list(self._subscribers):
+            self._close(queue)
+
+    async def publish(self, event_type: str, data: dict[str, Any]) -> None:
+        # Un fallo al publicar no debe tumbar la petición que ya hizo commit.
+        try:
+            await self.backend.publish(orjson.dumps({"type": event_type, "data": data}, option=orjson.OPT_UTC_Z))
+        except Exception:
+            logger.exception("Could not publish %s event", event_type)
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._subscribers) >= self.max_subscribers
+
+    def subscribe(self) -> asyncio.Queue[bytes | None]:
+        """Cola con frames SSE listos; `None` indica que el stream debe cerrarse."""
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue(self.queue_size)
+        if not self.accepting:
+            queue.put_nowait(None)
+            return queue
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[bytes | None]) -> None:
+        self._subscribers.discard(queue)
+
+    def _deliver(self, message: bytes) -> None:
+        try:
+            event = orjson.loads(message)
+        except orjson.JSONDecodeError:
+            logger.warning("Dropping malformed event")
+            return
+        handler = self._handlers.get(event["type"])
+        if handler is not None:
+            handler(event["data"])
+            return
+        # El frame SSE se arma una vez y se comparte entre todos los suscriptores.
+        frame = b"event: " + event["type"].encode() + b"\ndata: " + orjson.dumps(event["data"]) + b"\n\n"
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Cliente lento: se corta su stream y EventSource se reconecta y recarga.
+                self._close(queue)
+
+    def _close(self, queue: asyncio.Queue[bytes | None]) -> None:
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+
+def _build_backend() -> EventBackend:
+    if settings.events_backend == "postgres":
+        dsn = make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresNotifyBackend(dsn, settings.events_channel)
+    if settings.events_backend == "memory":
+        return InProcessBackend()
+    raise RuntimeError(f"Unknown EVENTS_BACKEND '{settings.events_backend}' (expected 'memory' or 'postgres')")
+
+
+event_broker = EventBroker(
+    _build_backend(),
+    queue_size=settings.events_queue_size,
+    max_subscribers=settings.events_max_subscribers,
+)
@@ -0,0 +1,33 @@
+import httpx
+
+from app.core.config import settings
+
+# Cliente compartido: reutiliza conexiones (keep-alive/TLS) entre descargas en lugar de abrir
+# una por request. Se crea perezosamente dentro del event loop y se cierra en el shutdown.
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.http_read_timeout_seconds,
+                connect=settings.http_connect_timeout_seconds,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_connections,
+            ),
+            follow_redirects=True,
+            max_redirects=settings.http_max_redirects,
+            headers={"User-Agent": "miniface-bot/1.0"},
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
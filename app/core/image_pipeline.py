@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import update
+
+from app.core.cache import feed_cache
+from app.core.config import settings
+from app.core.images import build_variants
+from app.core.media import media_path
+from app.core.metrics import media_io_duration
+from app.db.session import SessionLocal
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+# Cola en memoria + process pool: las variantes (thumbnail, ancho de feed) se generan después
+# de responder, así la latencia del upload no depende de Pillow. Si la cola está llena la imagen
+# se queda sin variantes y los clientes usan la original.
+_queue: asyncio.Queue[str] | None = None
+_workers: list[asyncio.Task] = []
+_executor: ProcessPoolExecutor | None = None
+
+
+def enqueue_image_variants(image_url: str | None) -> None:
+    if not image_url or _queue is None:
+        return
+    try:
+        _queue.put_nowait(image_url)
+    except asyncio.QueueFull:
+        logger.warning("Image pipeline queue is full, skipping variants for %s", image_url)
+
+
+async def _process(image_url: str) -> None:
+    source = media_path(image_url)
+    if source is None or not source.is_file():
+        return
+
+    loop = asyncio.get_running_loop()
+    with media_io_duration.time("variants"):
+        variants = await loop.run_in_executor(_executor, build_variants, str(source), settings.image_variant_format)
+    base_url = image_url.rsplit("/", maxsplit=1)[0]
+    variant_urls = {name: f"{base_url}/{file_name}" for name, file_name in variants.items()}
+
+    # Todos los posts que comparten la imagen reciben las variantes.
+    async with SessionLocal() as db:
+        await db.execute(update(Post).where(Post.image_url == image_url).values(image_variants=variant_urls))
+        await db.commit()
+    await feed_cache.invalidate()
+
+
+async def _worker(queue: asyncio.Queue[str]) -> None:
+    while True:
+        image_url = await queue.get()
+        try:
+            await _process(image_url)
+        except Exception:
+            logger.exception("Could not build image variants for %s", image_url)
+        finally:
+            queue.task_done()
+
+
+async def start_image_pipeline() -> None:
+    global _queue, _executor
+    if _queue is not None:
+        return
+    _queue = asyncio.Queue(maxsize=settings.image_queue_size)
+    # `spawn` evita heredar el event loop y las conexiones abiertas del proceso web.
+    _executor = ProcessPoolExecutor(
+        max_workers=settings.image_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    _workers.extend(asyncio.create_task(_worker(_queue)) for _ in range(settings.image_workers))
+
+
+async def stop_image_pipeline() -> None:
+    global _queue, _executor
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
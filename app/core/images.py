@@ -0,0 +1,51 @@
+import os
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+# Este módulo corre dentro del process pool del pipeline de imágenes: no debe importar la DB
+# ni nada que abra conexiones al importarse.
+
+# Nombre de variante -> lado máximo en píxeles (se conserva la proporción).
+VARIANT_SIZES = {"thumb": 320, "feed": 1080}
+
+_FORMATS = {"webp": ("WEBP", ".webp"), "avif": ("AVIF", ".avif")}
+
+
+def variant_format(preferred: str) -> str:
+    if preferred == "avif" and features.check("avif"):
+        return "avif"
+    return "webp"
+
+
+def variant_path(source: Path, name: str, image_format: str) -> Path:
+    return source.with_name(f"{source.stem}.{name}{_FORMATS[image_format][1]}")
+
+
+def build_variants(source_path: str, preferred_format: str = "webp") -> dict[str, str]:
+    source = Path(source_path)
+    image_format = variant_format(preferred_format)
+    pil_format = _FORMATS[image_format][0]
+    save_options: dict[str, int] = {"quality": 80}
+    if pil_format == "WEBP":
+        save_options["method"] = 4
+
+    targets = {name: variant_path(source, name, image_format) for name in VARIANT_SIZES}
+    pending = {name: path for name, path in targets.items() if not path.is_file()}
+    if pending:
+        with Image.open(source) as original:
+            # Se aplica la orientación EXIF antes de descartar los metadatos.
+            image = ImageOps.exif_transpose(original)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+
+            for name, path in pending.items():
+                max_side = VARIANT_SIZES[name]
+                variant = image.copy()
+                variant.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+                temp_path = path.with_name(f".{path.name}.tmp")
+                # Sin `exif=`/`icc_profile=` el archivo resultante no arrastra metadatos.
+                variant.save(temp_path, format=pil_format, **save_options)
+                os.replace(temp_path, path)
+
+    return {name: path.name for name, path in targets.items()}
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.automation import Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, Job], Awaitable[Any]]
+
+# Cola durable respaldada por la tabla `jobs`: sobrevive reinicios y varios procesos pueden
+# consumirla a la vez porque cada job se reclama con un UPDATE condicional sobre su estado.
+_handlers: dict[str, JobHandler] = {}
+_wakeup: asyncio.Event | None = None
+_workers: list[asyncio.Task] = []
+
+
+def register_job_handler(kind: str, handler: JobHandler) -> None:
+    _handlers[kind] = handler
+
+
+def enqueue_job(db: AsyncSession, kind: str, payload: dict[str, Any]) -> Job:
+    """Agrega el job a la sesión; queda visible para los workers cuando el llamador hace commit."""
+    job = Job(kind=kind, payload=payload, status="pending", attempts=0)
+    db.add(job)
+    return job
+
+
+async def complete_job(db: AsyncSession, job_id: int, result: Any) -> None:
+    """Marca el job como terminado en la transacción del llamador.
+
+    Un handler que escribe datos debe llamarlo antes de su propio commit: si el proceso muere o se
+    cancela después, el job no queda "running" y no se vuelve a ejecutar (ni a duplicar lo escrito).
+    """
+    await db.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .values(status="done", result=result, error=None, updated_at=datetime.utcnow())
+    )
+
+
+def wake_job_workers() -> None:
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def _stale(now: datetime):
+    # Un job "running" sin actividad durante `job_lock_seconds` quedó huérfano (worker caído).
+    return and_(Job.status == "running", Job.updated_at < now - timedelta(seconds=settings.job_lock_seconds))
+
+
+def _claimable(now: datetime):
+    # Reclamar un huérfano cuenta como un intento más: un job que tumba al worker no se reintenta para siempre.
+    return or_(Job.status == "pending", and_(_stale(now), Job.attempts < settings.job_max_attempts))
+
+
+async def _claim_next_job() -> Job | None:
+    async with SessionLocal() as db:
+        now = datetime.utcnow()
+        await db.execute(
+            update(Job)
+            .where(_stale(now), Job.attempts >= settings.job_max_attempts)
+            .values(status="failed", error="Job did not finish after the maximum number of attempts", updated_at=now)
+        )
+        await db.commit()
+        candidate_ids = (
+            await db.scalars(select(Job.id).where(_claimable(now)).order_by(Job.id).limit(settings.job_claim_batch))
+        ).all()
+        for job_id in candidate_ids:
+            claimed = await db.execute(
+                update(Job)
+                .where(Job.id == job_id, _claimable(now))
+                .values(status="running", attempts=Job.attempts + 1, updated_at=now)
+            )
+            await db.commit()
+            if claimed.rowcount == 1:
+                return await db.get(Job, job_id)
+    return None
+
+
+async def _run_job(job: Job) -> None:
+    handler = _handlers.get(job.kind)
+    values: dict[str, Any]
+    try:
+        if handler is None:
+            raise RuntimeError(f"No handler registered for job kind '{job.kind}'")
+        async with SessionLocal() as db:
+            result = await handler(db, job)
+            # Idempotente si el handler ya lo marcó dentro de su transacción.
+            await complete_job(db, job.id, result)
+            await db.commit()
+        return
+    except asyncio.CancelledError:
+        # Apagado en medio del job: lo que no llegó al commit se revierte y el job vuelve a la cola
+        # sin esperar `job_lock_seconds`. Si ya quedó "done" en la transacción del handler, no se toca.
+        await asyncio.shield(_release_cancelled_job(job.id))
+        raise
+    except HTTPException as exc:
+        # Error del payload (imagen inválida, autor inexistente...): reintentar no lo arregla.
+        values = {"status": "failed", "error": str(exc.detail)}
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job.id, job.kind)
+        retry = job.attempts < settings.job_max_attempts
+        values = {"status": "pending" if retry else "failed", "error": str(exc)}
+
+    async with SessionLocal() as db:
+        # Si el handler falló después de su commit, el job ya quedó "done" y no se reintenta.
+        await db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == "running")
+            .values(updated_at=datetime.utcnow(), **values)
+        )
+        await db.commit()
+
+
+async def _release_cancelled_job(job_id: int) -> None:
+    async with SessionLocal() as db:
+        await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "running")
+            .values(status="pending", attempts=Job.attempts - 1, updated_at=datetime.utcnow())
+        )
+        await db.commit()
+
+
+async def _worker(wakeup: asyncio.Event) -> None:
+    while True:
+        try:
+            job = await _claim_next_job()
+        except Exception:
+            logger.exception("Could not claim jobs")
+            job = None
+
+        if job is not None:
+            await _run_job(job)
+            continue
+
+        wakeup.clear()
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=settings.job_poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def start_job_workers() -> None:
+    global _wakeup
+    if _workers:
+        return
+    _wakeup = asyncio.Event()
+    _workers.extend(asyncio.create_task(_worker(_wakeup)) for _ in range(settings.job_workers))
+
+
+async def stop_job_workers() -> None:
+    global _wakeup
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _wakeup = None
@@ -0,0 +1,267 @@
+from typing import Any, Callable
+
+import orjson
+from fastapi import HTTPException, status
+
+StringSink = Callable[[bytes], None]
+
+_WHITESPACE = frozenset(b" \t\r\n")
+_SCALAR_BYTES = frozenset(b"0123456789+-.eEtrufalsn")
+_SIMPLE_ESCAPES = {
+    ord('"'): b'"',
+    ord("\\"): b"\\",
+    ord("/"): b"/",
+    ord("b"): b"\b",
+    ord("f"): b"\f",
+    ord("n"): b"\n",
+    ord("r"): b"\r",
+    ord("t"): b"\t",
+}
+
+# Qué se espera después del último token.
+_VALUE = "value"
+_VALUE_OR_END = "value_or_end"
+_KEY = "key"
+_KEY_OR_END = "key_or_end"
+_COLON = "colon"
+_COMMA_OR_END = "comma_or_end"
+_DONE = "done"
+
+# Costo aproximado en memoria (CPython) de cada contenedor y de cada elemento, además de sus bytes:
+# un `{}` o un `0` ocupan en el heap mucho más que su texto.
+_CONTAINER_COST = 64
+_ELEMENT_COST = 16
+
+
+def _invalid_json() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body")
+
+
+class JSONObjectStream:
+    """Parser JSON incremental que desvía strings grandes a un sink en vez de guardarlos.
+
+    `stream_fields` asocia rutas de claves (ej. ``("image_binary", "data")``) con una fábrica de
+    sinks: el contenido de ese string se entrega por bloques, ya sin escapes JSON, y la clave no
+    aparece en el documento que devuelve `close()`. El resto del documento se arma normalmente, no
+    puede superar `max_buffered_bytes` (contando el costo de cada contenedor y elemento) ni anidar
+    más de `max_depth` contenedores.
+    """
+
+    def __init__(
+        self,
+        stream_fields: dict[tuple[str, ...], Callable[[], StringSink]],
+        max_buffered_bytes: int,
+        max_depth: int,
+    ) -> None:
+        self._stream_fields = stream_fields
+        self._max_buffered_bytes = max_buffered_bytes
+        self._max_depth = max_depth
+        self._buffered = 0
+        self._carry = b""
+        self._state = _VALUE
+        self._root: Any = None
+        self._stack: list[dict[str, Any] | list[Any]] = []
+        self._keys: list[str | None] = []
+        self._scalar: bytearray | None = None
+        self._in_string = False
+        self._string_is_key = False
+        self._string_buffer = bytearray()
+        self._sink: StringSink | None = None
+        self._sink_parts: list[bytes] = []
+
+    def feed(self, chunk: bytes) -> None:
+        data = self._carry + chunk if self._carry else chunk
+        self._carry = b""
+        pos = 0
+        end = len(data)
+        while pos < end:
+            if self._in_string:
+                pos = self._scan_string(data, pos)
+                continue
+
+            byte = data[pos]
+            if self._scalar is not None:
+                if byte in _SCALAR_BYTES:
+                    self._scalar.append(byte)
+                    self._count(1)
+                    pos += 1
+                    continue
+                self._finish_scalar()
+
+            pos += 1
+            if byte in _WHITESPACE:
+                continue
+            if byte == ord('"'):
+                self._start_string()
+            elif byte == ord("{"):
+                self._open({}, _KEY_OR_END)
+            elif byte == ord("["):
+                self._open([], _VALUE_OR_END)
+            elif byte in (ord("}"), ord("]")):
+                self._close_container(dict if byte == ord("}") else list)
+            elif byte == ord(":"):
+                if self._state != _COLON:
+                    raise _invalid_json()
+                self._state = _VALUE
+            elif byte == ord(","):
+                if self._state != _COMMA_OR_END:
+                    raise _invalid_json()
+                self._state = _KEY if isinstance(self._stack[-1], dict) else _VALUE
+            elif byte in _SCALAR_BYTES and self._state in (_VALUE, _VALUE_OR_END):
+                self._scalar = bytearray((byte,))
+                self._count(1)
+            else:
+                raise _invalid_json()
+
+    def close(self) -> Any:
+        if self._scalar is not None:
+            self._finish_scalar()
+        if self._in_string or self._carry or self._state != _DONE:
+            raise _invalid_json()
+        return self._root
+
+    def _count(self, size: int) -> None:
+        self._buffered += size
+        if self._buffered > self._max_buffered_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="JSON body is too large",
+            )
+
+    def _add_value(self, value: Any) -> None:
+        self._count(_ELEMENT_COST)
+        if not self._stack:
+            self._root = value
+            self._state = _DONE
+            return
+        container = self._stack[-1]
+        if isinstance(container, list):
+            container.append(value)
+        else:
+            container[self._keys[-1]] = value
+        self._state = _COMMA_OR_END
+
+    def _open(self, container: dict[str, Any] | list[Any], state: str) -> None:
+        if self._state not in (_VALUE, _VALUE_OR_END):
+            raise _invalid_json()
+        if len(self._stack) >= self._max_depth:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="JSON body is nested too deeply")
+        self._count(_CONTAINER_COST)
+        self._add_value(container)
+        self._stack.append(container)
+        self._keys.append(None)
+        self._state = state
+
+    def _close_container(self, kind: type) -> None:
+        allowed = (_KEY_OR_END, _COMMA_OR_END) if kind is dict else (_VALUE_OR_END, _COMMA_OR_END)
+        if not self._stack or not isinstance(self._stack[-1], kind) or self._state not in allowed:
+            raise _invalid_json()
+        self._stack.pop()
+        self._keys.pop()
+        self._state = _COMMA_OR_END if self._stack else _DONE
+
+    def _finish_scalar(self) -> None:
+        assert self._scalar is not None
+        token, self._scalar = bytes(self._scalar), None
+        try:
+            value = orjson.loads(token)
+        except orjson.JSONDecodeError as exc:
+            raise _invalid_json() from exc
+        self._add_value(value)
+
+    def _start_string(self) -> None:
+        if self._state in (_KEY, _KEY_OR_END):
+            self._string_is_key = True
+        elif self._state in (_VALUE, _VALUE_OR_END):
+            self._string_is_key = False
+            if self._stack and isinstance(self._stack[-1], dict):
+                sink_factory = self._stream_fields.get(tuple(self._keys))
+                if sink_factory is not None:
+                    self._sink = sink_factory()
+        else:
+            raise _invalid_json()
+        self._in_string = True
+        self._string_buffer.clear()
+
+    def _emit(self, segment: bytes) -> None:
+        if self._sink is not None:
+            # Se acumula y se entrega una vez por bloque: el base64 MIME trae un `\n` cada 76 bytes.
+            self._sink_parts.append(segment)
+        else:
+            self._string_buffer += segment
+            self._count(len(segment))
+
+    def _scan_string(self, data: bytes, pos: int) -> int:
+        next_pos = self._scan_string_segments(data, pos)
+        self._flush_sink()
+        return next_pos
+
+    def _flush_sink(self) -> None:
+        if self._sink is not None and self._sink_parts:
+            parts, self._sink_parts = self._sink_parts, []
+            self._sink(b"".join(parts))
+
+    def _scan_string_segments(self, data: bytes, pos: int) -> int:
+        end = len(data)
+        quote = data.find(b'"', pos)
+        limit = end if quote < 0 else quote
+        while True:
+            backslash = data.find(b"\\", pos, limit)
+            if backslash < 0:
+                break
+            if backslash > pos:
+                self._emit(data[pos:backslash])
+            escape_end = backslash + (6 if backslash + 1 < end and data[backslash + 1] == ord("u") else 2)
+            if escape_end > end:
+                # Escape partido entre dos bloques.
+                self._carry = data[backslash:]
+                return end
+            self._emit_escape(data[backslash:escape_end])
+            pos = escape_end
+            if pos > limit:
+                quote = data.find(b'"', pos)
+                limit = end if quote < 0 else quote
+
+        if quote < 0:
+            if pos < end:
+                self._emit(data[pos:])
+            return end
+        if quote > pos:
+            self._emit(data[pos:quote])
+        self._finish_string()
+        return quote + 1
+
+    def _emit_escape(self, escape: bytes) -> None:
+        if self._sink is None:
+            # Los strings que se guardan se decodifican completos en `_finish_string`.
+            self._emit(escape)
+            return
+        if escape[1] == ord("u"):
+            try:
+                self._sink_parts.append(chr(int(escape[2:], 16)).encode("utf-8", "surrogatepass"))
+            except ValueError as exc:
+                raise _invalid_json() from exc
+            return
+        decoded = _SIMPLE_ESCAPES.get(escape[1])
+        if decoded is None:
+            raise _invalid_json()
+        self._sink_parts.append(decoded)
+
+    def _finish_string(self) -> None:
+        self._in_string = False
+        if self._sink is not None:
+            self._flush_sink()
+            self._sink = None
+            self._state = _COMMA_OR_END
+            return
+
+        try:
+            value = orjson.loads(b'"' + bytes(self._string_buffer) + b'"')
+        except orjson.JSONDecodeError as exc:
+            raise _invalid_json() from exc
+        self._string_buffer.clear()
+        if self._string_is_key:
+            self._keys[-1] = value
+            self._state = _COLON
+        else:
+            self._add_value(value)
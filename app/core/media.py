@@ -0,0 +1,426 @@
+import binascii
+import errno
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+from fastapi import HTTPException, status
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.core.metrics import media_io_duration
+
+CHUNK_SIZE = 64 * 1024
+
+# Firmas (magic bytes) de los formatos aceptados -> extensión. No se confía en content_type
+# ni en el nombre del archivo: el tipo se decide con los primeros bytes del contenido.
+_SIGNATURES: tuple[tuple[int, bytes, str], ...] = (
+    (0, b"\xff\xd8\xff", ".jpg"),
+    (0, b"\x89PNG\r\n\x1a\n", ".png"),
+    (0, b"GIF87a", ".gif"),
+    (0, b"GIF89a", ".gif"),
+    (8, b"WEBP", ".webp"),
+    (4, b"ftypavif", ".avif"),
+    (4, b"ftypheic", ".heic"),
+    (0, b"II*\x00", ".tif"),
+    (0, b"MM\x00*", ".tif"),
+    (0, b"BM", ".bmp"),
+)
+_SNIFF_BYTES = 16
+
+
+def sniff_image_extension(header: bytes) -> str | None:
+    for offset, signature, ext in _SIGNATURES:
+        if header[offset : offset + len(signature)] == signature:
+            if ext == ".webp" and not header.startswith(b"RIFF"):
+                continue
+            return ext
+    return None
+
+
+def media_url(relative_path: str) -> str:
+    return f"/{settings.media_dir}/{relative_path}"
+
+
+def media_path(image_url: str) -> Path | None:
+    prefix = f"/{settings.media_dir}/"
+    if not image_url.startswith(prefix):
+        return None
+    return Path(settings.media_dir) / image_url.removeprefix(prefix)
+
+
+def content_path(digest: str, extension: str) -> str:
+    # Almacenamiento direccionado por contenido: el nombre es el sha256 y se reparte en dos
+    # niveles de subdirectorios (ab/cd/abcd....png) para no tener millones de archivos juntos.
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def _reuse_existing(final_path: Path) -> bool:
+    """Reutiliza un archivo ya almacenado con el mismo contenido.
+
+    Le renueva el mtime: el barrido de media no borra archivos tocados hace menos de
+    `media_delete_grace_seconds`, que es el margen para que el post que lo usa llegue a la DB.
+    Devuelve False si el archivo no existe (o el barrido lo acaba de apartar) y hay que escribirlo.
+    """
+    try:
+        os.utime(final_path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _check_size(size: int, max_bytes: int) -> None:
+    if size > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image exceeds the maximum size of {max_bytes} bytes",
+        )
+
+
+def _check_extension(header: bytes) -> str:
+    extension = sniff_image_extension(header)
+    if extension is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be an image")
+    return extension
+
+
+class MediaWriter:
+    # Copia por bloques a un temporal dentro de media_dir (mismo filesystem, así el rename
+    # final es atómico), cortando apenas se supera el tamaño máximo o el contenido no es imagen.
+    def __init__(self, max_bytes: int | None = None) -> None:
+        self.max_bytes = max_bytes or settings.media_max_upload_bytes
+        self.size = 0
+        self.extension: str | None = None
+        self._header = b""
+        self._digest = hashlib.sha256()
+        # Tiempo de hash + escritura, sin contar la espera entre bloques (el body llega por la red).
+        self._io_seconds = 0.0
+        upload_dir = Path(settings.media_dir)
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=upload_dir, prefix=".upload-", delete=False)
+
+    def __enter__(self) -> "MediaWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if not self._file.closed:
+            self.abort()
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.size += len(chunk)
+        _check_size(self.size, self.max_bytes)
+        if self.extension is None and len(self._header) < _SNIFF_BYTES:
+            self._header += chunk[: _SNIFF_BYTES - len(self._header)]
+            if len(self._header) >= _SNIFF_BYTES:
+                self.extension = _check_extension(self._header)
+        started = time.perf_counter()
+        self._digest.update(chunk)
+        self._file.write(chunk)
+        self._io_seconds += time.perf_counter() - started
+
+    def commit(self) -> str:
+        if self.size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image is empty")
+        if self.extension is None:
+            self.extension = _check_extension(self._header)
+
+        started = time.perf_counter()
+        self._file.close()
+        relative_path = content_path(self._digest.hexdigest(), self.extension)
+        final_path = Path(settings.media_dir) / relative_path
+        if _reuse_existing(final_path):
+            # Mismo contenido ya almacenado: se descarta el temporal y se reutiliza el archivo.
+            Path(self._file.name).unlink(missing_ok=True)
+        else:
+            final_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._file.name, final_path)
+        media_io_duration.observe(self._io_seconds + time.perf_counter() - started, "write")
+        return media_url(relative_path)
+
+    def abort(self) -> None:
+        self._file.close()
+        Path(self._file.name).unlink(missing_ok=True)
+
+
+_BASE64_URLSAFE = bytes.maketrans(b"-_", b"+/")
+_BASE64_WHITESPACE = b" \t\r\n\x0b\x0c"
+_DATA_URL_MAX_HEADER = 1024
+
+
+class Base64MediaWriter(MediaWriter):
+    # Decodifica base64 (estándar o url-safe, con saltos de línea y opcionalmente como data URL)
+    # por bloques directo al temporal: ni el texto ni la imagen completos pasan por memoria.
+    def __init__(self, max_bytes: int | None = None) -> None:
+        super().__init__(max_bytes)
+        self.received = 0
+        self._head: bytes | None = b""
+        self._data_url = False
+        self._padded = False
+        self._pending = b""
+
+    def feed(self, text: bytes) -> None:
+        if not text:
+            return
+        self.received += len(text)
+        if self._head is not None:
+            head = (self._head + text).lstrip(_BASE64_WHITESPACE)
+            if head.startswith(b"data:"):
+                _, comma, text = head.partition(b",")
+                if not comma:
+                    if len(head) > _DATA_URL_MAX_HEADER:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image_base64 data URL"
+                        )
+                    self._head = head
+                    return
+                self._data_url = True
+            elif len(head) < 5 and b"data:".startswith(head):
+                self._head = head
+                return
+            else:
+                text = head
+            self._head = None
+        self._feed_encoded(text)
+
+    def _feed_encoded(self, text: bytes) -> None:
+        data = self._pending + text.translate(_BASE64_URLSAFE, _BASE64_WHITESPACE)
+        usable = len(data) - len(data) % 4
+        self._pending = data[usable:]
+        if usable:
+            self._decode(data[:usable])
+
+    def _decode(self, data: bytes) -> None:
+        if self._padded:
+            # Hubo relleno `=` en un bloque anterior y siguen llegando datos.
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image_base64 payload")
+        try:
+            decoded = binascii.a2b_base64(data, strict_mode=True)
+        except binascii.Error as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image_base64 payload") from exc
+        self._padded = data.endswith(b"=")
+        self.write(decoded)
+
+    def commit(self) -> str:
+        if self._head is not None:
+            head, self._head = self._head, None
+            if head.startswith(b"data:"):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image_base64 data URL")
+            self._feed_encoded(head)
+        if self._pending:
+            self._decode(self._pending + b"=" * (-len(self._pending) % 4))
+            self._pending = b""
+        if self.size == 0:
+            detail = "Invalid image_base64 data URL" if self._data_url else "image_base64 is empty"
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+        return super().commit()
+
+
+def save_chunks(chunks: Iterable[bytes], max_bytes: int | None = None) -> str:
+    with MediaWriter(max_bytes) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+        return writer.commit()
+
+
+def iter_file_chunks(file: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterable[bytes]:
+    while chunk := file.read(chunk_size):
+        yield chunk
+
+
+def save_file(file: BinaryIO) -> str:
+    return save_chunks(iter_file_chunks(file))
+
+
+def save_bytes(content: bytes) -> str:
+    # Con el contenido ya en memoria se calcula el hash primero: un duplicado no escribe nada.
+    _check_size(len(content), settings.media_max_upload_bytes)
+    extension = _check_extension(content[:_SNIFF_BYTES])
+    relative_path = content_path(hashlib.sha256(content).hexdigest(), extension)
+    if _reuse_existing(Path(settings.media_dir) / relative_path):
+        return media_url(relative_path)
+    return save_chunks((content,))
+
+
+def save_base64(text: str) -> str:
+    with Base64MediaWriter() as writer:
+        for start in range(0, len(text), CHUNK_SIZE):
+            try:
+                chunk = text[start : start + CHUNK_SIZE].encode("ascii")
+            except UnicodeEncodeError as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image_base64 payload"
+                ) from exc
+            writer.feed(chunk)
+        return writer.commit()
+
+
+# Errores con los que una copia en kernel no está disponible para este par de archivos
+# (distinto filesystem, syscall inexistente, tipo de archivo no soportado).
+_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF}
+
+
+def _copy_file(source: BinaryIO, target: BinaryIO, size: int) -> None:
+    # copy_file_range (que en XFS/Btrfs hace reflink) -> sendfile -> mmap por bloques. Cada etapa
+    # retoma desde el offset alcanzado por la anterior; los datos nunca pasan enteros por Python.
+    source_fd, target_fd = source.fileno(), target.fileno()
+    offset = 0
+    for kernel_copy in (getattr(os, "copy_file_range", None), getattr(os, "sendfile", None)):
+        if kernel_copy is None:
+            continue
+        try:
+            while offset < size:
+                if kernel_copy is os.sendfile:
+                    os.lseek(target_fd, offset, os.SEEK_SET)
+                    copied = os.sendfile(target_fd, source_fd, offset, size - offset)
+                else:
+                    copied = os.copy_file_range(source_fd, target_fd, size - offset, offset, offset)
+                if copied == 0:
+                    break
+                offset += copied
+        except OSError as exc:
+            if exc.errno not in _COPY_UNSUPPORTED:
+                raise
+        if offset >= size:
+            return
+
+    with mmap.mmap(source_fd, 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            target.seek(offset)
+            while offset < size:
+                target.write(view[offset : offset + CHUNK_SIZE])
+                offset += CHUNK_SIZE
+        finally:
+            view.release()
+
+
+def save_path(source: Path, allow_link: bool = False) -> str:
+    """Guarda en el store un archivo que ya está en disco, sin cargarlo en memoria.
+
+    Con `allow_link` se intenta primero un hardlink (mismo filesystem): el archivo queda
+    compartido con su origen, que no debe modificarse en el lugar después.
+    """
+    with media_io_duration.time("copy"):
+        return _store_path(source, allow_link)
+
+
+def _store_path(source: Path, allow_link: bool) -> str:
+    with source.open("rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image is empty")
+        _check_size(size, settings.media_max_upload_bytes)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            extension = _check_extension(mapped[:_SNIFF_BYTES])
+            digest = hashlib.sha256(mapped).hexdigest()
+
+        relative_path = content_path(digest, extension)
+        final_path = Path(settings.media_dir) / relative_path
+        if _reuse_existing(final_path):
+            return media_url(relative_path)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if allow_link:
+            try:
+                os.link(source, final_path)
+                # El hardlink conserva el mtime del origen, que puede ser viejo.
+                os.utime(final_path)
+                return media_url(relative_path)
+            except FileExistsError:
+                if _reuse_existing(final_path):
+                    return media_url(relative_path)
+            except OSError:
+                pass
+
+        with tempfile.NamedTemporaryFile(dir=settings.media_dir, prefix=".upload-", delete=False) as target:
+            try:
+                _copy_file(file, target, size)
+            except BaseException:
+                target.close()
+                Path(target.name).unlink(missing_ok=True)
+                raise
+        os.replace(target.name, final_path)
+        return media_url(relative_path)
+
+
+# Borrado en dos pasos para el barrido de media (`app/core/media_sweeper.py`): primero el original se
+# aparta con un rename atómico a un nombre oculto; desde ese momento un upload con el mismo contenido
+# ya no lo encuentra y escribe su propia copia. Recién entonces se revisan mtime y referencias en la
+# DB, y el archivo se borra o vuelve a su lugar.
+def hide_media(image_url: str) -> Path | None:
+    """Aparta el archivo; devuelve su nombre temporal, o None si ya no existe."""
+    image_path = media_path(image_url)
+    if image_path is None:
+        return None
+    hidden_path = image_path.with_name(f".deleting-{image_path.name}")
+    try:
+        os.rename(image_path, hidden_path)
+    except FileNotFoundError:
+        # Un barrido anterior lo apartó y se cortó antes de borrarlo o restaurarlo: se retoma.
+        return hidden_path if hidden_path.exists() else None
+    return hidden_path
+
+
+def restore_media(image_url: str, hidden_path: Path) -> None:
+    # Si otro upload ya escribió el mismo contenido en su lugar, reemplazarlo no cambia nada.
+    os.replace(hidden_path, media_path(image_url))
+
+
+def purge_media(image_url: str, hidden_path: Path) -> None:
+    hidden_path.unlink(missing_ok=True)
+    image_path = media_path(image_url)
+    if image_path.exists():
+        # Un upload volvió a escribir el mismo contenido: sus variantes siguen en uso.
+        return
+    # Variantes (`<nombre>.thumb.webp`, `<nombre>.feed.webp`, ...). Si el original vuelve a subirse
+    # después, el pipeline de imágenes regenera las que falten.
+    for path in image_path.parent.glob(f"{image_path.stem}.*"):
+        if path.is_file():
+            path.unlink(missing_ok=True)
+
+
+class MediaFiles(StaticFiles):
+    # Cada archivo de media tiene un nombre único ligado a su contenido (sha256 o uuid heredado),
+    # así que puede cachearse para siempre y el propio nombre sirve de ETag fuerte.
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        file_path = Path(full_path)
+        if file_path.name.startswith("."):
+            # Temporales de escrituras en curso.
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+        headers = {
+            "cache-control": f"public, max-age={settings.media_cache_max_age}, immutable",
+            "etag": f'"{file_path.stem}"',
+        }
+        response = FileResponse(file_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+
+        if settings.media_sendfile_header:
+            # El proxy (nginx: X-Accel-Redirect, Apache/lighttpd: X-Sendfile) entrega el archivo.
+            if settings.media_sendfile_header.lower() == "x-accel-redirect":
+                target = f"{settings.media_internal_prefix.rstrip('/')}/{self.get_path(scope)}"
+            else:
+                target = str(file_path.resolve())
+            return Response(
+                status_code=status_code,
+                media_type=response.media_type,
+                headers={**headers, settings.media_sendfile_header: target},
+            )
+        return response
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.media import hide_media, purge_media, restore_media
+from app.db.session import SessionLocal
+from app.models.media import MediaDeletion
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+# Borrar el archivo en el mismo request que borra el post compite con un upload concurrente del mismo
+# contenido: el upload ve el archivo, lo reutiliza y hace commit de un post que apunta a un archivo
+# recién borrado. Por eso el borrado se encola en la transacción del post y lo hace este barrido:
+# aparta el archivo (ver `hide_media`), respeta el margen de los uploads que lo reutilizaron hace
+# poco y vuelve a contar referencias antes de borrarlo. Cada worker corre su barrido, así que cada
+# fila se reclama (`claimed_until`) antes de tocar su archivo.
+_task: asyncio.Task | None = None
+
+
+async def queue_media_deletion(db: AsyncSession, image_url: str) -> None:
+    """Encola el archivo en la transacción del llamador (se aplica con su commit)."""
+    dialect_name = db.bind.dialect.name
+    if dialect_name == "postgresql":
+        insert = postgresql.insert
+    elif dialect_name == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise NotImplementedError(f"Media deletion queue is not available for {dialect_name}")
+    # Si un barrido la tiene reclamada, se libera: lo que ese barrido concluyó puede no valer ya para
+    # este borrado, y no podrá quitar la fila.
+    await db.execute(
+        insert(MediaDeletion)
+        .values(image_url=image_url, queued_at=datetime.utcnow())
+        .on_conflict_do_update(index_elements=[MediaDeletion.image_url], set_={"claimed_until": None})
+    )
+
+
+async def _sweep_one(db: AsyncSession, image_url: str) -> bool:
+    """Procesa un archivo encolado; False si hay que reintentarlo en el próximo barrido."""
+    hidden_path = await run_in_threadpool(hide_media, image_url)
+    if hidden_path is None:
+        # Ni el archivo ni uno apartado: ya no existe y no queda nada que borrar.
+        logger.info("Queued media %s was already gone", image_url)
+        return True
+
+    recently_reused = time.time() - os.stat(hidden_path).st_mtime < settings.media_delete_grace_seconds
+    referenced = await db.scalar(select(Post.id).where(Post.image_url == image_url).limit(1)) is not None
+    if referenced or recently_reused:
+        await run_in_threadpool(restore_media, image_url, hidden_path)
+        # Sin referencias pero reutilizado hace poco: el post de ese upload quizás todavía no hizo commit.
+        return referenced
+    await run_in_threadpool(purge_media, image_url, hidden_path)
+    return True
+
+
+def _claimable(now: datetime):
+    # Una reclamación vencida es de un barrido que se cortó (worker caído).
+    return or_(MediaDeletion.claimed_until.is_(None), MediaDeletion.claimed_until < now)
+
+
+async def sweep_media() -> int:
+    """Un barrido de la cola; devuelve cuántos archivos resolvió."""
+    async with SessionLocal() as db:
+        now = datetime.utcnow()
+        claimed_until = now + timedelta(seconds=settings.media_sweep_lock_seconds)
+        # UPDATE condicional: si dos barridos eligen la misma fila, solo uno la obtiene.
+        candidates = (
+            select(MediaDeletion.image_url)
+            .where(_claimable(now))
+            .order_by(MediaDeletion.queued_at)
+            .limit(settings.media_sweep_batch)
+        )
+        image_urls = (
+            await db.scalars(
+                update(MediaDeletion)
+                .where(MediaDeletion.image_url.in_(candidates.scalar_subquery()), _claimable(now))
+                .values(claimed_until=claimed_until)
+                .returning(MediaDeletion.image_url)
+            )
+        ).all()
+        await db.commit()
+
+        done: list[str] = []
+        retry: list[str] = []
+        for image_url in image_urls:
+            (done if await _sweep_one(db, image_url) else retry).append(image_url)
+
+        # Solo se tocan las filas que siguen reclamadas por este barrido (ver `queue_media_deletion`).
+        owned = MediaDeletion.claimed_until == claimed_until
+        if done:
+            await db.execute(delete(MediaDeletion).where(MediaDeletion.image_url.in_(done), owned))
+        if retry:
+            await db.execute(
+                update(MediaDeletion).where(MediaDeletion.image_url.in_(retry), owned).values(claimed_until=None)
+            )
+        await db.commit()
+    return len(done)
+
+
+async def _sweep_forever() -> None:
+    while True:
+        try:
+            await sweep_media()
+        except Exception:
+            logger.exception("Media sweep failed")
+        await asyncio.sleep(settings.media_sweep_interval_seconds)
+
+
+async def start_media_sweeper() -> None:
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_sweep_forever())
+
+
+async def stop_media_sweeper() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
@@ -0,0 +1,218 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Métricas en memoria del proceso, expuestas en `/metrics` con el formato de texto de Prometheus.
+# Con varios workers cada proceso tiene las suyas: Prometheus las agrega al scrapear cada uno.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        # Se observa también desde los hilos del threadpool (guardado de imágenes, bcrypt).
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}" for labels, value in values
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str) -> None:
+        super().__init__(name, documentation)
+        self.value = 0.0
+
+    def add(self, amount: float) -> None:
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> list[str]:
+        return self._header() + [f"{self.name} {_format_number(self.value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # Por serie: conteo (no acumulado) de cada bucket + el de +Inf, y la suma.
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = [(labels, list(counts), total[0]) for labels, (counts, total) in self._series.items()]
+        lines = self._header()
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = bound if isinstance(bound, str) else _format_number(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+registry: list[_Metric] = []
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_requests = Counter("miniface_http_requests_total", "Requests HTTP atendidos.", ("method", "route", "status"))
+http_request_duration = Histogram(
+    "miniface_http_request_duration_seconds", "Latencia de cada request HTTP.", ("method", "route")
+)
+http_requests_in_flight = Gauge("miniface_http_requests_in_flight", "Requests HTTP en curso (incluye streams SSE).")
+http_request_size = Histogram(
+    "miniface_http_request_size_bytes", "Bytes recibidos en el body.", ("method", "route"), SIZE_BUCKETS
+)
+http_response_size = Histogram(
+    "miniface_http_response_size_bytes", "Bytes enviados en el body.", ("method", "route"), SIZE_BUCKETS
+)
+password_hash_duration = Histogram(
+    "miniface_password_hash_seconds", "Tiempo de bcrypt (cola + cómputo) por operación.", ("operation",)
+)
+password_hash_rejected = Counter(
+    "miniface_password_hash_rejected_total", "Operaciones de bcrypt rechazadas con 503 por cola llena."
+)
+media_io_duration = Histogram(
+    "miniface_media_io_seconds", "Tiempo de guardado de imágenes y generación de variantes.", ("operation",)
+)
+rate_limited = Counter("miniface_rate_limited_total", "Requests rechazadas con 429 por rate limit.", ("limit",))
+load_shed = Counter("miniface_load_shed_total", "Requests rechazadas con 503 por la compuerta de concurrencia.", ("gate",))
+db_query_duration = Histogram("miniface_db_query_seconds", "Duración de cada query a la base de datos.")
+db_checkout_wait = Histogram("miniface_db_pool_checkout_seconds", "Espera para obtener una conexión del pool.")
+
+
+def _route_label(scope: Scope) -> str:
+    # La plantilla de la ruta (`/api/posts/{post_id}`), no la URL: así la cardinalidad queda acotada.
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unmatched")
+    if "endpoint" in scope:
+        # Apps montadas (StaticFiles de media): el router deja el prefijo en `root_path`.
+        return scope.get("root_path") or "unmatched"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_bytes = 0
+        response_bytes = 0
+        status_code = 500
+
+        async def receive_counting() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_counting(message: Message) -> None:
+            nonlocal response_bytes, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.add(1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_counting, send_counting)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.add(-1)
+            method, route = scope["method"], _route_label(scope)
+            http_requests.inc(method, route, str(status_code))
+            http_request_duration.observe(elapsed, method, route)
+            http_request_size.observe(request_bytes, method, route)
+            http_response_size.observe(response_bytes, method, route)
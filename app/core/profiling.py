@@ -0,0 +1,81 @@
+import cProfile
+import logging
+import secrets
+import threading
+import time
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pyinstrument es opcional; sin él se usa cProfile.
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+
+
+class ProfilingMiddleware:
+    """Perfila una request bajo demanda, sin redeploy.
+
+    Solo con `PROFILE_TOKEN` definido: una request con `X-Profile: <token>` se perfila completa y
+    el volcado queda en `profile_dir` (HTML de pyinstrument si está instalado, si no un `.prof` de
+    cProfile para `snakeviz`/`pstats`). La respuesta indica el archivo en `X-Profile-File`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        # cProfile mide todo el hilo del event loop (también las requests concurrentes) y no admite
+        # dos perfiles a la vez: se perfila de a una request y el resto se atiende normalmente.
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.profile_token or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._busy.release()
+
+    def _requested(self, scope: Scope) -> bool:
+        token = Headers(scope=scope).get(PROFILE_HEADER)
+        return token is not None and secrets.compare_digest(token.encode(), settings.profile_token.encode())
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profile_dir = Path(settings.profile_dir)
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        slug = scope["path"].strip("/").replace("/", "_") or "root"
+        stem = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{slug}-{secrets.token_hex(4)}"
+        target = profile_dir / f"{stem}{'.html' if Profiler is not None else '.prof'}"
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-file", target.name.encode())]
+            await send(message)
+
+        if Profiler is not None:
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                await self.app(scope, receive, send_with_header)
+            finally:
+                profiler.stop()
+                target.write_text(profiler.output_html(), encoding="utf-8")
+        else:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_with_header)
+            finally:
+                profile.disable()
+                profile.dump_stats(target)
+        logger.info("Profile for %s %s written to %s", scope["method"], scope["path"], target)
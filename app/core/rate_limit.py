@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Protocol
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import settings
+from app.core.metrics import load_shed, rate_limited
+from app.db.session import engine
+from app.models.rate_limit import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend(Protocol):
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Consume un token del bucket `key`; devuelve 0 si hay, o los segundos hasta el próximo."""
+        ...
+
+
+# Buckets en memoria con LRU: con varios workers cada proceso lleva su propia cuenta (el límite
+# efectivo se multiplica por la cantidad de workers); para compartirla se usa `DatabaseRateLimitBackend`.
+class InMemoryRateLimitBackend:
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated_at) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class DatabaseRateLimitBackend:
+    # Un solo upsert por request: la recarga y el consumo se calculan en el UPDATE, así dos
+    # workers no pueden gastar el mismo token. Solo al rechazar se lee el bucket para el Retry-After.
+    def __init__(self, purge_interval_seconds: int) -> None:
+        self.purge_interval_seconds = purge_interval_seconds
+        self._next_purge_at = 0.0
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        table = RateLimitBucket.__table__
+        now = time.time()
+        dialect_name = engine.dialect.name
+        if dialect_name == "postgresql":
+            insert, least = postgresql.insert, func.least
+        elif dialect_name == "sqlite":
+            insert, least = sqlite.insert, func.min
+        else:
+            raise NotImplementedError(f"Database rate limiting is not available for {dialect_name}")
+
+        refilled = least(literal(float(burst)), table.c.tokens + (now - table.c.updated_at) * rate)
+        statement = (
+            insert(table)
+            .values(key=key, tokens=burst - 1.0, updated_at=now, full_at=now + 1.0 / rate)
+            .on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={"tokens": refilled - 1, "updated_at": now, "full_at": now + (burst - refilled + 1) / rate},
+                where=refilled >= 1,
+            )
+            .returning(table.c.key)
+        )
+        async with engine.begin() as connection:
+            if now >= self._next_purge_at:
+                self._next_purge_at = now + self.purge_interval_seconds
+                await connection.execute(delete(table).where(table.c.full_at < now))
+            if (await connection.execute(statement)).first() is not None:
+                return 0.0
+            row = (
+                await connection.execute(select(table.c.tokens, table.c.updated_at).where(table.c.key == key))
+            ).first()
+        if row is None:
+            return 0.0
+        tokens = min(float(burst), row.tokens + (now - row.updated_at) * rate)
+        return max((1 - tokens) / rate, 0.0)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    name: str
+    per_minute: float
+    burst: int
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend) -> None:
+        self.backend = backend
+
+    async def hit(self, limit: RateLimit, identity: str) -> None:
+        """Consume un token de `limit` para `identity` o lanza 429 con `Retry-After`."""
+        if limit.per_minute <= 0 or limit.burst <= 0:
+            return
+        try:
+            wait = await self.backend.take(f"{limit.name}:{identity}", limit.per_minute / 60, limit.burst)
+        except Exception:
+            # Si el backend compartido falla se deja pasar: el rate limit no debe tumbar el login.
+            logger.exception("Rate limit backend failed for %s", limit.name)
+            return
+        if wait > 0:
+            rate_limited.inc(limit.name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, retry later",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+class ConcurrencyGate:
+    """Limita cuántas requests caras corren a la vez, con una cola acotada y una espera máxima.
+
+    Lo que no entra se rechaza con 503 en vez de encolarse sin límite: así una ráfaga sobre
+    login o ingesta no se come el CPU ni el pool de la DB que usan las demás rutas.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(limit)
+        self._admitted = 0
+
+    def _shed(self) -> HTTPException:
+        load_shed.inc(self.name)
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, retry shortly",
+            headers={"Retry-After": str(max(1, math.ceil(self.max_wait)))},
+        )
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._admitted >= self.limit + self.max_queue:
+            raise self._shed()
+        self._admitted += 1
+        try:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                raise self._shed() from None
+            try:
+                yield
+            finally:
+                self._semaphore.release()
+        finally:
+            self._admitted -= 1
+
+
+def _build_backend() -> RateLimitBackend:
+    if settings.rate_limit_backend == "database":
+        return DatabaseRateLimitBackend(settings.rate_limit_purge_interval_seconds)
+    if settings.rate_limit_backend == "memory":
+        return InMemoryRateLimitBackend(settings.rate_limit_max_keys)
+    raise RuntimeError(
+        f"Unknown RATE_LIMIT_BACKEND '{settings.rate_limit_backend}' (expected 'memory' or 'database')"
+    )
+
+
+LOGIN_IP = RateLimit("login:ip", settings.rate_limit_login_ip_per_minute, settings.rate_limit_login_ip_burst)
+LOGIN_ACCOUNT = RateLimit(
+    "login:account", settings.rate_limit_login_account_per_minute, settings.rate_limit_login_account_burst
+)
+REGISTER_IP = RateLimit("register:ip", settings.rate_limit_register_ip_per_minute, settings.rate_limit_register_ip_burst)
+N8N_KEY = RateLimit("n8n:key", settings.rate_limit_n8n_per_minute, settings.rate_limit_n8n_burst)
+
+rate_limiter = RateLimiter(_build_backend())
+expensive_gate = ConcurrencyGate(
+    "expensive",
+    limit=settings.expensive_max_concurrency,
+    max_queue=settings.expensive_max_queue,
+    max_wait=settings.expensive_max_wait_seconds,
+)
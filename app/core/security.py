@@ -1,22 +1,57 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, TypeVar
 
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.metrics import password_hash_duration, password_hash_rejected
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# bcrypt libera el GIL, así que un pool de hilos propio basta para sacarlo del event loop.
+# El semáforo limita trabajos en ejecución + en cola y rechaza el resto con 503.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash",
+)
+_password_slots = threading.BoundedSemaphore(settings.password_hash_workers + settings.password_hash_max_queue)
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def _run_password_task(func: Callable[..., T], *args: str) -> T:
+    if not _password_slots.acquire(blocking=False):
+        password_hash_rejected.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password service is busy, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        with password_hash_duration.time(func.__name__):
+            return await asyncio.wrap_future(_password_executor.submit(func, *args))
+    finally:
+        _password_slots.release()
 
 
-def create_access_token(subject: str) -> str:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_task(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await _run_password_task(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def hash_password(password: str) -> str:
+    return await _run_password_task(pwd_context.hash, password)
+
+
+def create_access_token(subject: str, extra_claims: dict[str, Any] | None = None) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
-    to_encode = {"sub": subject, "exp": expire}
+    to_encode = {**(extra_claims or {}), "sub": subject, "exp": expire}
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
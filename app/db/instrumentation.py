@@ -0,0 +1,126 @@
+import statistics
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import db_checkout_wait, db_query_duration
+
+
+@dataclass
+class RequestDbStats:
+    query_count: int = 0
+    query_time: float = 0.0
+    checkout_wait: float = 0.0
+
+
+_request_stats: ContextVar[RequestDbStats | None] = ContextVar("request_db_stats", default=None)
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    if len(samples) == 1:
+        return {"p50": samples[0], "p95": samples[0], "p99": samples[0], "max": samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49], 3),
+        "p95": round(cuts[94], 3),
+        "p99": round(cuts[98], 3),
+        "max": round(max(samples), 3),
+    }
+
+
+class DbStatsRecorder:
+    def __init__(self, window: int = 1000) -> None:
+        self._window: deque[RequestDbStats] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.queries = 0
+
+    def record(self, stats: RequestDbStats) -> None:
+        with self._lock:
+            self._window.append(stats)
+            self.requests += 1
+            self.queries += stats.query_count
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            window = list(self._window)
+            requests, queries = self.requests, self.queries
+        return {
+            "requests": requests,
+            "queries": queries,
+            "window": len(window),
+            "queries_per_request": _percentiles([float(item.query_count) for item in window]),
+            "query_time_ms": _percentiles([item.query_time * 1000 for item in window]),
+            "checkout_wait_ms": _percentiles([item.checkout_wait * 1000 for item in window]),
+        }
+
+
+db_stats = DbStatsRecorder()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # `_do_get` es lo que bloquea cuando el pool está agotado: medirlo da la espera real de checkout.
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - started
+            db_checkout_wait.observe(elapsed)
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.checkout_wait += elapsed
+
+
+def install_query_hooks(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        db_query_duration.observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.query_count += 1
+            stats.query_time += elapsed
+
+
+class DbStatsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats()
+        token = _request_stats.set(stats)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and stats.query_count:
+                timing = (
+                    f'db;dur={stats.query_time * 1000:.1f};desc="{stats.query_count} queries", '
+                    f"db-checkout;dur={stats.checkout_wait * 1000:.1f}"
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            if stats.query_count:
+                db_stats.record(stats)
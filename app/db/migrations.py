@@ -0,0 +1,51 @@
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+# Revisión equivalente al esquema que dejaba `create_all` antes de las migraciones.
+LEGACY_REVISION = "0001"
+# Clave del advisory lock de PostgreSQL: un solo proceso migra a la vez (deploys solapados).
+_MIGRATION_LOCK_KEY = 4_242_001
+
+
+def _alembic_config(connection: Connection) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection
+    # El logging ya lo configuró uvicorn/la app; `fileConfig` lo pisaría.
+    config.attributes["configure_logging"] = False
+    return config
+
+
+def _upgrade(connection: Connection) -> None:
+    postgres = connection.dialect.name == "postgresql"
+    if postgres:
+        # Lock de sesión: sobrevive a los commits de cada revisión y de los bloques autocommit.
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _MIGRATION_LOCK_KEY})
+    tables = set(inspect(connection).get_table_names())
+    # Alembic abre su propia transacción por revisión: la conexión no puede llegar con una abierta.
+    connection.commit()
+    try:
+        config = _alembic_config(connection)
+        if "users" in tables and "alembic_version" not in tables:
+            logger.warning("Database has tables but no alembic_version: stamping revision %s", LEGACY_REVISION)
+            command.stamp(config, LEGACY_REVISION)
+        command.upgrade(config, "head")
+    finally:
+        if postgres:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _MIGRATION_LOCK_KEY})
+            connection.commit()
+
+
+async def upgrade_database() -> None:
+    """Aplica las migraciones pendientes (`alembic upgrade head`) con el engine de la app."""
+    async with engine.connect() as connection:
+        await connection.run_sync(_upgrade)
@@ -0,0 +1,59 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Cookie con la que un cliente que acaba de escribir sigue leyendo del primario, aunque la
+# siguiente request caiga en otro worker: así ve su propio post aunque la réplica tenga lag.
+READ_PRIMARY_COOKIE = "miniface_read_primary"
+
+
+@dataclass
+class RequestRouting:
+    pinned: bool = False
+    wrote: bool = False
+
+
+_request_routing: ContextVar[RequestRouting | None] = ContextVar("request_routing", default=None)
+
+
+def record_write() -> None:
+    routing = _request_routing.get()
+    if routing is not None:
+        routing.wrote = True
+
+
+def use_primary() -> bool:
+    routing = _request_routing.get()
+    return routing is not None and (routing.pinned or routing.wrote)
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cookie_header = next((value for name, value in scope["headers"] if name == b"cookie"), b"")
+        routing = RequestRouting(pinned=READ_PRIMARY_COOKIE in cookie_parser(cookie_header.decode("latin-1")))
+        token = _request_routing.set(routing)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and routing.wrote:
+                cookie = (
+                    f"{READ_PRIMARY_COOKIE}=1; Max-Age={max(1, round(settings.db_read_your_writes_seconds))}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _request_routing.reset(token)
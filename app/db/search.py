@@ -0,0 +1,57 @@
+import re
+
+from sqlalchemy import Subquery, bindparam, cast, func, literal, literal_column, select, table, text
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+
+from app.core.config import settings
+from app.models.post import Post
+
+# Índice de texto completo de `posts.content`, según el motor (lo crea la migración 0005):
+# - PostgreSQL: índice GIN sobre la expresión `to_tsvector(...)`. La consulta usa exactamente la
+#   misma expresión, con la configuración como literal y no como parámetro, para que el planner
+#   pueda usar el índice.
+# - SQLite: tabla virtual FTS5 `posts_fts` (external content) sincronizada con triggers.
+_SEARCH_DOCUMENT = f"to_tsvector('{settings.search_text_config}'::regconfig, coalesce(posts.content, ''))"
+
+_posts_fts = table("posts_fts")
+_WORD = re.compile(r"\w+")
+
+
+def _fts5_query(query: str) -> str | None:
+    # La sintaxis de MATCH interpreta comillas, operadores y columnas: se pasa cada palabra como
+    # frase literal (AND implícito) para que ninguna entrada del usuario sea un error de sintaxis.
+    words = _WORD.findall(query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words)
+
+
+def search_matches(dialect_name: str, query: str) -> Subquery | None:
+    """Subconsulta `(id, score)` con los posts que coinciden; mayor `score` = más relevante.
+
+    Devuelve None si la búsqueda no tiene términos utilizables.
+    """
+    if dialect_name == "postgresql":
+        tsquery = func.websearch_to_tsquery(cast(literal(settings.search_text_config), REGCONFIG), query)
+        search_vector = literal_column(_SEARCH_DOCUMENT, TSVECTOR)
+        return (
+            select(Post.id.label("id"), func.ts_rank(search_vector, tsquery).label("score"))
+            .where(search_vector.op("@@")(tsquery))
+            .subquery("matches")
+        )
+
+    if dialect_name == "sqlite":
+        match = _fts5_query(query)
+        if match is None:
+            return None
+        return (
+            select(
+                literal_column("posts_fts.rowid").label("id"),
+                (-func.bm25(literal_column("posts_fts"))).label("score"),
+            )
+            .select_from(_posts_fts)
+            .where(text("posts_fts MATCH :match").bindparams(bindparam("match", match)))
+            .subquery("matches")
+        )
+
+    raise NotImplementedError(f"Full-text search is not available for {dialect_name}")
@@ -1,15 +1,93 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import itertools
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.db.instrumentation import InstrumentedQueuePool, install_query_hooks
+from app.db.routing import record_write, use_primary
+
+
+def _async_database_url(database_url: str) -> URL:
+    url = make_url(database_url)
+    if url.drivername.startswith("postgresql"):
+        # asyncpg no entiende `sslmode` (formato libpq); su equivalente es `ssl`.
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode:
+            query["ssl"] = sslmode
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    if url.drivername.startswith("sqlite"):
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+def _engine_options(url: URL) -> dict[str, Any]:
+    options: dict[str, Any] = {"pool_pre_ping": settings.db_pool_pre_ping}
+    # SQLite en memoria usa StaticPool (una sola conexión), que no admite tamaño ni overflow.
+    if url.drivername.startswith("sqlite") and url.database in (None, "", ":memory:"):
+        return options
+    return {
+        **options,
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+    }
+
+
+def _create_engine(database_url: str) -> AsyncEngine:
+    url = _async_database_url(database_url)
+    created = create_async_engine(url, **_engine_options(url))
+    install_query_hooks(created.sync_engine)
+    return created
+
+
+class PrimarySession(Session):
+    """Sesión del primario: cada flush cuenta como escritura para el ruteo de lecturas."""
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _after_flush(session, flush_context) -> None:
+    record_write()
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+engine = _create_engine(settings.database_url)
+SessionLocal = async_sessionmaker(
+    bind=engine, sync_session_class=PrimarySession, autoflush=False, expire_on_commit=False
+)
+
+read_engines = [_create_engine(url.strip()) for url in (settings.database_read_url or "").split(",") if url.strip()]
+_read_sessionmakers = itertools.cycle(
+    [async_sessionmaker(bind=read_engine, autoflush=False, expire_on_commit=False) for read_engine in read_engines]
+)
+
+
+def read_session() -> AsyncSession:
+    """Sesión para lecturas: la próxima réplica, o el primario si no hay o hubo una escritura reciente."""
+    if not read_engines or use_primary():
+        return SessionLocal()
+    return next(_read_sessionmakers)()
+
+
+async def dispose_engines() -> None:
+    for current in (engine, *read_engines):
+        await current.dispose()
+
+
+def is_replica(db: AsyncSession) -> bool:
+    return db.bind is not engine
+
+
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_read_db():
+    async with read_session() as db:
         yield db
-    finally:
-        db.close()
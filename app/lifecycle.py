@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import signal
+import threading
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from app.api.routes.posts import list_posts
+from app.core.config import settings
+from app.core.events import event_broker
+from app.core.security import pwd_context
+from app.db.migrations import upgrade_database
+from app.db.session import SessionLocal, engine, read_engines
+
+logger = logging.getLogger(__name__)
+
+# Estado del proceso para `/health`: "starting" -> "ready" -> "draining".
+state = "starting"
+
+
+async def prepare() -> None:
+    """Crea el directorio de media y aplica las migraciones pendientes.
+
+    Con `python -m app.server` corre una sola vez antes de levantar los workers; con
+    `uvicorn app.main:app` (desarrollo) lo hace el startup de la app.
+    """
+    Path(settings.media_dir).mkdir(parents=True, exist_ok=True)
+    await upgrade_database()
+
+
+async def warm_up() -> None:
+    # Conexiones del pool abiertas, backend de bcrypt cargado y primera página del feed en caché:
+    # la primera request después de un deploy no paga el arranque en frío.
+    for current in (engine, *read_engines):
+        pool_size = current.pool.size() if isinstance(current.pool, QueuePool) else 1
+        async with AsyncExitStack() as stack:
+            connections = await asyncio.gather(
+                *(stack.enter_async_context(current.connect()) for _ in range(pool_size))
+            )
+            await asyncio.gather(*(connection.execute(text("SELECT 1")) for connection in connections))
+
+    pwd_context.handler("bcrypt").get_backend()
+
+    async with SessionLocal() as db:
+        await list_posts(limit=settings.feed_page_size, cursor=None, if_none_match=None, db=db)
+
+
+def _begin_draining() -> None:
+    global state
+    state = "draining"
+    # Los streams SSE no terminan solos y uvicorn esperaría el timeout completo: se cierran
+    # apenas llega la señal y los clientes reconectan contra otro worker.
+    event_broker.drain()
+    logger.info("Draining: closed live feed streams")
+
+
+def install_drain_handlers() -> None:
+    """Encadena SIGTERM/SIGINT con los handlers de uvicorn (que siguen haciendo el apagado)."""
+    if threading.current_thread() is not threading.main_thread():
+        # Solo el hilo principal puede instalar handlers (ej. la app corriendo en un TestClient).
+        return
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous) -> None:
+            loop.call_soon_threadsafe(_begin_draining)
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
+def mark_ready() -> None:
+    global state
+    state = "ready"
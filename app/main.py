@@ -1,14 +1,26 @@
-from pathlib import Path
+import secrets
+from typing import Any
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.responses import FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from sqlalchemy.pool import Pool, QueuePool
 
+from app import lifecycle
+from app.api.idempotency import IdempotencyFingerprintMiddleware
 from app.api.router import api_router
 from app.core.config import settings
-from app.db.base import Base
-from app.db.session import engine
+from app.core.events import event_broker
+from app.core.http import close_http_client
+from app.core.media import MediaFiles
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.image_pipeline import start_image_pipeline, stop_image_pipeline
+from app.core.job_queue import start_job_workers, stop_job_workers
+from app.core.media_sweeper import start_media_sweeper, stop_media_sweeper
+from app.db.instrumentation import DbStatsMiddleware, db_stats
+from app.db.routing import ReadYourWritesMiddleware
+from app.db.session import dispose_engines, engine, read_engines
 
 app = FastAPI(title=settings.app_name, version=settings.app_version)
 
@@ -20,23 +32,85 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(IdempotencyFingerprintMiddleware)
+app.add_middleware(DbStatsMiddleware)
+if read_engines:
+    app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
 app.include_router(api_router)
 
-upload_path = Path(settings.media_dir)
-upload_path.mkdir(exist_ok=True)
-app.mount(f"/{settings.media_dir}", StaticFiles(directory=settings.media_dir), name="uploads")
+# El directorio se crea en `prepare()`, no al importar (el runner importa la app en cada worker).
+app.mount(f"/{settings.media_dir}", MediaFiles(directory=settings.media_dir, check_dir=False), name="uploads")
 
 
 @app.on_event("startup")
-def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
+async def on_startup() -> None:
+    if settings.prepare_on_startup:
+        await lifecycle.prepare()
+    await start_image_pipeline()
+    await start_job_workers()
+    await start_media_sweeper()
+    await event_broker.start()
+    if settings.warm_up_on_startup:
+        await lifecycle.warm_up()
+    lifecycle.install_drain_handlers()
+    lifecycle.mark_ready()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await event_broker.stop()
+    await stop_job_workers()
+    await stop_media_sweeper()
+    await stop_image_pipeline()
+    await close_http_client()
+    await dispose_engines()
 
 
 @app.get("/health")
-def health_check() -> dict[str, str]:
+def health_check(response: Response) -> dict[str, str]:
+    # Mientras el worker se apaga responde 503 para que el balanceador deje de enviarle tráfico.
+    if lifecycle.state != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": lifecycle.state}
     return {"status": "ok"}
 
 
+def _pool_status(pool: Pool) -> dict[str, Any]:
+    pool_status: dict[str, Any] = {"class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        pool_status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    return pool_status
+
+
+@app.get("/health/db")
+def db_health_check() -> dict[str, Any]:
+    health: dict[str, Any] = {"pool": _pool_status(engine.pool), "requests": db_stats.snapshot()}
+    if read_engines:
+        health["replicas"] = [_pool_status(read_engine.pool) for read_engine in read_engines]
+    return health
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: str | None = Header(default=None)) -> Response:
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}"
+        if authorization is None or not secrets.compare_digest(authorization.encode(), expected.encode()):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.get("/", include_in_schema=False)
 def serve_miniface() -> FileResponse:
     return FileResponse("miniface.html")
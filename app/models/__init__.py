@@ -1,4 +1,7 @@
+from app.models.automation import IdempotencyKey, Job
+from app.models.media import MediaDeletion
 from app.models.post import Post
+from app.models.rate_limit import RateLimitBucket
 from app.models.user import User
 
-__all__ = ["User", "Post"]
+__all__ = ["User", "Post", "IdempotencyKey", "Job", "RateLimitBucket", "MediaDeletion"]
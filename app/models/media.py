@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class MediaDeletion(Base):
+    """Archivo de media que quedó sin posts; lo borra el barrido si sigue sin referencias."""
+
+    __tablename__ = "media_deletions"
+
+    image_url: Mapped[str] = mapped_column(String(500), primary_key=True)
+    queued_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    # Cada worker corre su barrido: la fila se reclama hasta esta hora para procesarla en uno solo.
+    claimed_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, Text
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -8,11 +8,20 @@ from app.db.base import Base
 
 class Post(Base):
     __tablename__ = "posts"
+    # Índices compuestos para el feed paginado por (created_at, id), global y por autor; el segundo
+    # también cubre la FK `owner_id`.
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_owner_id_created_at_id", "owner_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
-    image_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
-    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Varios posts pueden compartir imagen (media direccionada por contenido); el índice permite
+    # contar referencias antes de borrar el archivo.
+    image_url: Mapped[str | None] = mapped_column(String(500), nullable=True, index=True)
+    image_variants: Mapped[dict[str, str] | None] = mapped_column(JSON, nullable=True)
+    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
     owner = relationship("User", back_populates="posts")
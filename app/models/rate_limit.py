@@ -0,0 +1,17 @@
+from sqlalchemy import Float, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class RateLimitBucket(Base):
+    """Token bucket compartido entre workers (backend `database` del rate limiter)."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    # Epoch en segundos (no DateTime): la recarga se calcula con aritmética en el mismo UPDATE.
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)
+    # Momento en que el bucket vuelve a estar lleno; desde ahí la fila equivale a no tenerla y se purga.
+    full_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
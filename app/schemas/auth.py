@@ -8,3 +8,6 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: str
+    username: str | None = None
+    ver: int = 0
+    exp: int | None = None
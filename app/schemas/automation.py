@@ -1,7 +1,10 @@
+from datetime import datetime
 from typing import Any
 
 from pydantic import BaseModel, Field
 
+from app.schemas.post import PostOut
+
 
 class N8NPostCreate(BaseModel):
     content: str = Field(..., min_length=1, max_length=2000)
@@ -28,7 +31,7 @@ class N8NPostCreate(BaseModel):
     )
     image_filename: str | None = Field(
         default=None,
-        description="Nombre de archivo sugerido para la imagen (opcional).",
+        description="Nombre de archivo original (opcional). La extensión se detecta por el contenido.",
     )
     image_binary: dict[str, Any] | None = Field(
         default=None,
@@ -38,3 +41,30 @@ class N8NPostCreate(BaseModel):
             "se intentará leer desde N8N_BINARY_DATA_ROOT."
         ),
     )
+
+
+class N8NBulkItemResult(BaseModel):
+    index: int
+    ok: bool
+    post: PostOut | None = None
+    error: str | None = None
+
+
+class N8NBulkResult(BaseModel):
+    created: int
+    failed: int
+    results: list[N8NBulkItemResult]
+
+
+class AutomationJobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    result: Any | None = None
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
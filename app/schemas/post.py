@@ -7,12 +7,25 @@ class PostCreate(BaseModel):
     content: str
 
 
+class PostAuthor(BaseModel):
+    id: int
+    username: str
+    avatar_url: str | None = None
+
+
 class PostOut(BaseModel):
     id: int
     content: str
     image_url: str | None
+    image_variants: dict[str, str] | None = None
     owner_id: int
+    author: PostAuthor | None = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class PostPage(BaseModel):
+    items: list[PostOut]
+    next_cursor: str | None = None
@@ -18,3 +18,7 @@ class UserOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class CurrentUser(UserOut):
+    token_version: int = 0
@@ -0,0 +1,91 @@
+"""Entry point de producción: `python -m app.server`.
+
+Prepara media y esquema una sola vez y después levanta `WEB_CONCURRENCY` workers de uvicorn
+sobre el mismo socket (por defecto, las CPUs disponibles del contenedor con `EVENTS_BACKEND=postgres`
+y un solo worker con el backend en memoria). Con SIGTERM cada worker
+deja de aceptar conexiones, cierra los streams SSE y espera hasta `GRACEFUL_TIMEOUT_SECONDS` a
+las requests en curso; SIGHUP reinicia los workers y SIGTTIN/SIGTTOU suman o quitan uno.
+"""
+
+import asyncio
+import logging
+import math
+import os
+from pathlib import Path
+
+import uvicorn
+
+from app.core.config import settings
+from app.db.session import dispose_engines
+from app.lifecycle import prepare
+
+logger = logging.getLogger(__name__)
+
+
+def _cgroup_cpu_limit() -> int | None:
+    # cgroup v2 (`cpu.max` = "<quota> <period>" o "max <period>") y v1 (cfs_quota_us / cfs_period_us).
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    return max(1, math.ceil(quota / period)) if quota > 0 else None
+
+
+def available_cpus() -> int:
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+def worker_count() -> int:
+    # Sin un backend de eventos compartido cada worker tendría sus propios streams SSE y su caché del
+    # feed se desactivaría (no hay cómo avisarle de las escrituras de los demás): por defecto, uno solo.
+    distributed = settings.events_backend == "postgres"
+    if settings.web_concurrency is None:
+        return available_cpus() if distributed else 1
+    if settings.web_concurrency > 1 and not distributed:
+        logger.warning(
+            "WEB_CONCURRENCY=%d with EVENTS_BACKEND=%s: live feed events only reach clients of the same "
+            "worker and the feed cache is disabled. Set EVENTS_BACKEND=postgres to share them.",
+            settings.web_concurrency,
+            settings.events_backend,
+        )
+    return settings.web_concurrency
+
+
+def main() -> None:
+    async def prepare_once() -> None:
+        try:
+            await prepare()
+        finally:
+            await dispose_engines()
+
+    asyncio.run(prepare_once())
+
+    # Los workers se lanzan con `spawn` y leen la configuración del entorno al importar la app;
+    # con un solo worker uvicorn corre en este mismo proceso.
+    os.environ["PREPARE_ON_STARTUP"] = "false"
+    settings.prepare_on_startup = False
+    workers = worker_count()
+    # Cada worker necesita saber si comparte el puerto con otros (ej. para desactivar la caché del feed).
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    settings.web_concurrency = workers
+    uvicorn.run(
+        "app.main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=workers,
+        timeout_graceful_shutdown=settings.graceful_timeout_seconds,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# Benchmark reproducible de los caminos calientes de la API, en proceso (httpx + ASGITransport):
+# siembra N usuarios y M posts y mide throughput y p50/p95/p99 de
+#   - GET /api/posts (con la caché del feed caliente y sin ella)
+#   - POST /api/auth/token
+#   - POST /api/posts con imágenes de varios tamaños
+#   - POST /api/automation/n8n/posts con imagen en base64 (JSON) y binaria (multipart)
+# y guarda el resultado en JSON para comparar entre commits.
+#
+# Uso (desde la raíz del repo):
+#   python -m benchmarks.hot_paths --users 50 --posts 5000
+#   python -m benchmarks.hot_paths --compare benchmarks/results/<anterior>.json
+#
+# Sin DATABASE_URL se usa un SQLite temporal; con DATABASE_URL apunta a un Postgres local de pruebas
+# (los usuarios sembrados llevan un prefijo por corrida, no se borra nada).
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+_workdir = tempfile.mkdtemp(prefix="miniface-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("MEDIA_DIR", os.path.join(_workdir, "uploads"))
+os.environ.setdefault("N8N_API_KEY", "benchmark-n8n-key")
+# El benchmark mide la API, no el rate limiter: todas las requests salen de la misma IP.
+for _limit in ("LOGIN_IP", "LOGIN_ACCOUNT", "REGISTER_IP", "N8N"):
+    os.environ.setdefault(f"RATE_LIMIT_{_limit}_PER_MINUTE", "0")
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.cache import feed_cache  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.security import hash_password  # noqa: E402
+from app.db.migrations import upgrade_database  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.post import Post  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+PASSWORD = "bench-password"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+class _Images:
+    # Bytes aleatorios con cabecera PNG; cada request cambia los últimos 9 bytes para que el store
+    # direccionado por contenido no pueda deduplicarlo. El base64 del prefijo (múltiplo de 3 bytes)
+    # se calcula una vez y generar cada payload no pesa en la medición.
+    def __init__(self, size: int) -> None:
+        header = b"\x89PNG\r\n\x1a\n"
+        prefix_size = max(size - 9, len(header)) // 3 * 3
+        self.prefix = header + os.urandom(prefix_size - len(header))
+        self.prefix_base64 = base64.b64encode(self.prefix).decode()
+
+    def raw(self, index: int) -> bytes:
+        return self.prefix + index.to_bytes(9, "big")
+
+    def base64(self, index: int) -> str:
+        return self.prefix_base64 + base64.b64encode(index.to_bytes(9, "big")).decode()
+
+
+def _parse_sizes(value: str) -> list[int]:
+    units = {"k": 1024, "m": 1024 * 1024}
+    sizes = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        multiplier = units.get(part[-1:], 1)
+        sizes.append(int(part.rstrip("km")) * multiplier)
+    return sizes
+
+
+def _size_label(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size // (1024 * 1024)}m"
+    return f"{size // 1024}k"
+
+
+async def _seed(prefix: str, users: int, posts: int) -> list[str]:
+    await upgrade_database()
+
+    # Un solo hash para todos: sembrar no debe costar `users` veces bcrypt.
+    hashed_password = await hash_password(PASSWORD)
+    emails = [f"{prefix}-{index}@bench.example" for index in range(users)]
+    async with SessionLocal() as db:
+        user_ids = (
+            await db.scalars(
+                insert(User).returning(User.id),
+                [
+                    {"email": email, "username": f"{prefix}-{index}", "hashed_password": hashed_password}
+                    for index, email in enumerate(emails)
+                ],
+            )
+        ).all()
+        batch = 1000
+        for start in range(0, posts, batch):
+            await db.execute(
+                insert(Post),
+                [
+                    {"content": f"post {index} de benchmark", "owner_id": user_ids[index % len(user_ids)]}
+                    for index in range(start, min(start + batch, posts))
+                ],
+            )
+        await db.commit()
+    return emails
+
+
+def _summary(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    if not latencies:
+        return {"requests": 0, "errors": errors, "rps": 0.0}
+    ordered = sorted(latencies)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = ordered[0]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+async def _measure(
+    client: httpx.AsyncClient,
+    request: Request,
+    total: int,
+    concurrency: int,
+    before_each: Callable[[], Awaitable[None]] | None = None,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in counter:
+            if before_each is not None:
+                await before_each()
+            started = time.perf_counter()
+            response = await request(client, index)
+            if response.is_success:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(latencies, errors, time.perf_counter() - started)
+
+
+async def _scenarios(client: httpx.AsyncClient, emails: list[str], args: argparse.Namespace) -> dict[str, Any]:
+    n8n_headers = {"X-N8N-KEY": settings.n8n_api_key or ""}
+    tokens: list[str] = []
+    for email in emails[: args.concurrency]:
+        response = await client.post("/api/auth/token", data={"username": email, "password": PASSWORD})
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+
+    def auth(index: int) -> dict[str, str]:
+        return {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+
+    scenarios: list[tuple[str, Request, int, Callable[[], Awaitable[None]] | None]] = [
+        ("feed_cached", lambda c, i: c.get("/api/posts"), args.feed_requests, None),
+        ("feed_uncached", lambda c, i: c.get("/api/posts"), args.feed_requests, feed_cache.invalidate),
+        (
+            "login",
+            lambda c, i: c.post("/api/auth/token", data={"username": random.choice(emails), "password": PASSWORD}),
+            args.login_requests,
+            None,
+        ),
+        (
+            "create_post_text",
+            lambda c, i: c.post("/api/posts", data={"content": f"bench {i}"}, headers=auth(i)),
+            args.write_requests,
+            None,
+        ),
+    ]
+
+    for size in args.image_sizes:
+        label = _size_label(size)
+        images = _Images(size)
+        scenarios += [
+            (
+                f"create_post_image_{label}",
+                lambda c, i, images=images: c.post(
+                    "/api/posts",
+                    data={"content": f"bench {i}"},
+                    files={"image": ("bench.png", images.raw(i), "image/png")},
+                    headers=auth(i),
+                ),
+                args.write_requests,
+                None,
+            ),
+            (
+                f"n8n_base64_{label}",
+                lambda c, i, images=images: c.post(
+                    "/api/automation/n8n/posts",
+                    json={
+                        "content": f"n8n {i}",
+                        "author_email": emails[i % len(emails)],
+                        "image_base64": images.base64(i + args.write_requests),
+                    },
+                    headers=n8n_headers,
+                ),
+                args.write_requests,
+                None,
+            ),
+            (
+                f"n8n_binary_{label}",
+                lambda c, i, images=images: c.post(
+                    "/api/automation/n8n/posts",
+                    data={"content": f"n8n {i}", "author_email": emails[i % len(emails)]},
+                    files={"image": ("bench.png", images.raw(i + 2 * args.write_requests), "image/png")},
+                    headers=n8n_headers,
+                ),
+                args.write_requests,
+                None,
+            ),
+        ]
+
+    results: dict[str, Any] = {}
+    for name, request, total, before_each in scenarios:
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        results[name] = await _measure(client, request, total, args.concurrency, before_each)
+        _print_row(name, results[name])
+    return results
+
+
+def _print_row(name: str, result: dict[str, Any], baseline: dict[str, Any] | None = None) -> None:
+    line = (
+        f"{name:<26}{result['requests']:>7}{result['errors']:>7}{result['rps']:>9.1f}"
+        f"{result.get('p50_ms', 0):>10.2f}{result.get('p95_ms', 0):>10.2f}{result.get('p99_ms', 0):>10.2f}"
+    )
+    if baseline and baseline.get("p95_ms"):
+        change = (result.get("p95_ms", 0) - baseline["p95_ms"]) / baseline["p95_ms"] * 100
+        line += f"{change:>+10.1f}%"
+    print(line)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    random.seed(args.seed)
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    emails = await _seed(prefix, args.users, args.posts)
+
+    print(f"{'escenario':<26}{'n':>7}{'err':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        results = await _scenarios(client, emails, args)
+    await engine.dispose()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "users": args.users,
+            "posts": args.posts,
+            "concurrency": args.concurrency,
+            "image_sizes": args.image_sizes,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de los caminos calientes de la API")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--feed-requests", type=int, default=500)
+    parser.add_argument("--login-requests", type=int, default=50)
+    parser.add_argument("--write-requests", type=int, default=40)
+    parser.add_argument(
+        "--image-sizes",
+        type=_parse_sizes,
+        default=_parse_sizes("100k,1m,4m"),
+        help="Tamaños de imagen separados por coma (ej. 100k,1m,4m)",
+    )
+    parser.add_argument("--only", nargs="*", help="Prefijos de escenarios a ejecutar (ej. feed login)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Archivo JSON de salida (por defecto benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, help="JSON de una corrida anterior para comparar el p95")
+    args = parser.parse_args()
+
+    report = asyncio.run(_run(args))
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"{stamp}-{report['meta']['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResultados en {output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        print(f"\nComparación de p95 contra {args.compare} ({baseline['meta'].get('commit')})")
+        for name, result in report["results"].items():
+            _print_row(name, result, baseline["results"].get(name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# Mide la latencia de POST /api/auth/token con y sin tráfico paralelo a GET /api/posts.
+#
+# Uso (desde la raíz del repo, requiere `pip install httpx`):
+#   python -m benchmarks.login_under_feed_load --logins 200 --login-concurrency 16 --feed-concurrency 32
+#
+# Si no hay DATABASE_URL se usa un SQLite temporal.
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+_workdir = tempfile.mkdtemp(prefix="miniface-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("MEDIA_DIR", os.path.join(_workdir, "uploads"))
+# El benchmark mide la API, no el rate limiter: todos los logins son de la misma cuenta e IP.
+for _limit in ("LOGIN_IP", "LOGIN_ACCOUNT", "REGISTER_IP", "N8N"):
+    os.environ.setdefault(f"RATE_LIMIT_{_limit}_PER_MINUTE", "0")
+
+import httpx  # noqa: E402
+
+from app.core.security import hash_password  # noqa: E402
+from app.db.migrations import upgrade_database  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.post import Post  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+async def _seed(posts: int) -> None:
+    await upgrade_database()
+    async with SessionLocal() as db:
+        user = User(email=EMAIL, username="bench", hashed_password=await hash_password(PASSWORD))
+        db.add(user)
+        await db.flush()
+        db.add_all(Post(content=f"post {index}", owner_id=user.id) for index in range(posts))
+        await db.commit()
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100)
+    return {"p50": cuts[49] * 1000, "p95": cuts[94] * 1000, "p99": cuts[98] * 1000}
+
+
+async def _login_load(client: httpx.AsyncClient, total: int, concurrency: int) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    rejected = 0
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for index in range(total):
+        queue.put_nowait(index)
+
+    async def worker() -> None:
+        nonlocal rejected
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.post("/api/auth/token", data={"username": EMAIL, "password": PASSWORD})
+            if response.status_code == 503:
+                rejected += 1
+                continue
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, rejected
+
+
+async def _feed_load(client: httpx.AsyncClient, concurrency: int, stop: asyncio.Event) -> list[float]:
+    latencies: list[float] = []
+
+    async def worker() -> None:
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = await client.get("/api/posts")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def _run(args: argparse.Namespace) -> None:
+    await _seed(args.posts)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        baseline, baseline_rejected = await _login_load(client, args.logins, args.login_concurrency)
+
+        stop = asyncio.Event()
+        feed_task = asyncio.create_task(_feed_load(client, args.feed_concurrency, stop))
+        mixed, mixed_rejected = await _login_load(client, args.logins, args.login_concurrency)
+        stop.set()
+        feed = await feed_task
+    await engine.dispose()
+
+    rows = [
+        ("login (solo)", baseline, baseline_rejected),
+        ("login (con feed)", mixed, mixed_rejected),
+        ("feed (con login)", feed, 0),
+    ]
+    print(f"{'escenario':<20}{'n':>7}{'503':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, samples, rejected in rows:
+        stats = _percentiles(samples)
+        print(f"{name:<20}{len(samples):>7}{rejected:>6}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latencia de login con y sin carga del feed")
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--login-concurrency", type=int, default=8)
+    parser.add_argument("--feed-concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Compara la memoria pico por request al recibir una imagen en base64 dentro del JSON de n8n:
+# el camino anterior (body completo + json.loads + validación + re.sub/replace + b64decode) contra
+# el parser incremental que decodifica el base64 directo al archivo.
+#
+# Uso (desde la raíz del repo):
+#   python -m benchmarks.n8n_payload_memory --sizes 1 4 8
+#
+# La memoria sale de `tracemalloc` (asignaciones de Python, sin contar el body ya recibido).
+import argparse
+import base64
+import binascii
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Iterable
+
+_workdir = tempfile.mkdtemp(prefix="miniface-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("MEDIA_DIR", os.path.join(_workdir, "uploads"))
+os.environ.setdefault("MEDIA_MAX_UPLOAD_BYTES", str(64 * 1024 * 1024))
+
+import json  # noqa: E402
+
+import orjson  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.json_stream import JSONObjectStream  # noqa: E402
+from app.core.media import Base64MediaWriter, save_bytes  # noqa: E402
+from app.schemas.automation import N8NPostCreate  # noqa: E402
+
+# Tamaño de los bloques que entrega el servidor ASGI (uvicorn lee de a 64 KiB).
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+def _legacy_decode_base64_image(image_base64: str) -> bytes:
+    raw_data = image_base64.strip()
+    if raw_data.startswith("data:"):
+        _, _, raw_data = raw_data.partition(",")
+    raw_data = re.sub(r"\s+", "", raw_data)
+    raw_data = raw_data.replace("-", "+").replace("_", "/")
+    raw_data += "=" * (-len(raw_data) % 4)
+    try:
+        return base64.b64decode(raw_data, validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise SystemExit(f"invalid payload: {exc}") from exc
+
+
+def legacy(chunks: Iterable[bytes]) -> str:
+    body = b"".join(chunks)
+    payload = N8NPostCreate.model_validate(json.loads(body))
+    return save_bytes(_legacy_decode_base64_image(payload.image_base64 or ""))
+
+
+def streaming(chunks: Iterable[bytes]) -> str:
+    writer = Base64MediaWriter()
+    parser = JSONObjectStream(
+        {("image_base64",): lambda: writer.feed},
+        max_buffered_bytes=settings.n8n_json_max_buffered_bytes,
+        max_depth=settings.n8n_json_max_depth,
+    )
+    with writer:
+        for chunk in chunks:
+            parser.feed(chunk)
+        N8NPostCreate.model_validate(parser.close())
+        return writer.commit()
+
+
+def _body(image_mib: int) -> list[bytes]:
+    image = b"\x89PNG\r\n\x1a\n" + os.urandom(image_mib * 1024 * 1024)
+    encoded = base64.b64encode(image).decode()
+    # n8n suele enviar el base64 con saltos de línea MIME cada 76 caracteres.
+    wrapped = "\n".join(encoded[index : index + 76] for index in range(0, len(encoded), 76))
+    body = orjson.dumps({"content": "benchmark", "author_email": "bench@example.com", "image_base64": wrapped})
+    return [body[index : index + BODY_CHUNK_SIZE] for index in range(0, len(body), BODY_CHUNK_SIZE)]
+
+
+def _measure(func: Callable[[Iterable[bytes]], str], chunks: list[bytes]) -> tuple[float, float]:
+    # El tiempo se mide en una corrida aparte: tracemalloc encarece cada asignación.
+    started = time.perf_counter()
+    func(iter(chunks))
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    func(iter(chunks))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024), elapsed * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memoria pico al recibir imágenes base64 de n8n")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 8], help="Tamaños de imagen en MiB")
+    args = parser.parse_args()
+
+    print(f"{'imagen':>8} {'body':>9} {'antes (pico)':>14} {'después (pico)':>16} {'antes':>10} {'después':>10}")
+    for size in args.sizes:
+        chunks = _body(size)
+        body_mib = sum(len(chunk) for chunk in chunks) / (1024 * 1024)
+        legacy_peak, legacy_ms = _measure(legacy, chunks)
+        streaming_peak, streaming_ms = _measure(streaming, chunks)
+        print(
+            f"{size:>5} MiB {body_mib:>5.1f} MiB {legacy_peak:>10.1f} MiB {streaming_peak:>12.2f} MiB"
+            f" {legacy_ms:>7.0f} ms {streaming_ms:>7.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
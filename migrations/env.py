@@ -0,0 +1,60 @@
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+
+from app import models  # noqa: F401  (registra las tablas en Base.metadata para autogenerate)
+from app.db.base import Base
+from app.db.session import engine
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logging", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_name(name: str | None, type_: str, parent_names: dict) -> bool:
+    # La tabla FTS5 de búsqueda (y sus tablas internas) la maneja la migración 0005, no los modelos.
+    return not (type_ == "table" and name is not None and name.startswith("posts_fts"))
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_name=include_name,
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    # Una transacción por revisión: las que crean índices CONCURRENTLY salen de la transacción
+    # con `autocommit_block()` sin arrastrar a las anteriores.
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif (connection := config.attributes.get("connection")) is not None:
+    # Llamado desde la app (`app.db.migrations`), que ya tiene una conexión abierta en su event loop.
+    do_run_migrations(connection)
+else:
+    asyncio.run(run_async_migrations())
@@ -0,0 +1,23 @@
+"""Versión de tokens por usuario (revoca los JWT emitidos al subirla)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade() -> None:
+    # Con default constante, PostgreSQL 11+ agrega la columna sin reescribir la tabla.
+    op.add_column("users", sa.Column("token_version", sa.Integer(), server_default="0", nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "token_version")
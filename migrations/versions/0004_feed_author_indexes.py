@@ -0,0 +1,47 @@
+"""Índices del feed y del timeline por autor, creados sin bloquear la tabla
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+"""
+
+from alembic import op
+
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+# En PostgreSQL `CREATE/DROP INDEX CONCURRENTLY` no bloquea escrituras pero no puede correr dentro de
+# una transacción. Si se interrumpe deja un índice INVALID: bórralo (`DROP INDEX CONCURRENTLY ...`) y
+# vuelve a correr la migración.
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Feed global: ORDER BY created_at DESC, id DESC con keyset sobre (created_at, id).
+        op.create_index(
+            "ix_posts_created_at_id",
+            "posts",
+            ["created_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Timeline de un autor: WHERE owner_id = ? con el mismo orden; también cubre la FK.
+        op.create_index(
+            "ix_posts_owner_id_created_at_id",
+            "posts",
+            ["owner_id", "created_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Queda cubierto por el prefijo del índice anterior.
+        op.drop_index("ix_posts_owner_id", table_name="posts", postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index("ix_posts_owner_id", "posts", ["owner_id"], postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index(
+            "ix_posts_owner_id_created_at_id", table_name="posts", postgresql_concurrently=True, if_exists=True
+        )
+        op.drop_index("ix_posts_created_at_id", table_name="posts", postgresql_concurrently=True, if_exists=True)
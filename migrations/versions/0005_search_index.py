@@ -0,0 +1,56 @@
+"""Índice de texto completo de posts.content
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+"""
+
+from alembic import op
+
+from app.core.config import settings
+
+revision: str = "0005"
+down_revision: str | None = "0004"
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+# PostgreSQL: índice GIN sobre la expresión, creado CONCURRENTLY. Una columna generada `tsvector`
+# reescribiría la tabla con un lock exclusivo. La expresión debe ser idéntica a la de `app/db/search.py`
+# para que el planner use el índice; cambiar SEARCH_TEXT_CONFIG requiere una migración nueva.
+_SEARCH_DOCUMENT = f"to_tsvector('{settings.search_text_config}'::regconfig, coalesce(content, ''))"
+
+# SQLite: tabla virtual FTS5 (external content) sincronizada con triggers.
+_SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+    "content, content='posts', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF content ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content); END",
+    # Indexa los posts que ya existían.
+    "INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_search ON posts USING GIN ({_SEARCH_DOCUMENT})")
+    elif dialect_name == "sqlite":
+        for statement in _SQLITE_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_search")
+    elif dialect_name == "sqlite":
+        for trigger in ("posts_fts_ai", "posts_fts_ad", "posts_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS posts_fts")
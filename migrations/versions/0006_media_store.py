@@ -0,0 +1,41 @@
+"""Media por contenido: referencias por image_url, variantes y cola de borrado
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0006"
+down_revision: str | None = "0005"
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("posts", sa.Column("image_variants", sa.JSON(), nullable=True))
+    op.create_table(
+        "media_deletions",
+        sa.Column("image_url", sa.String(length=500), nullable=False),
+        sa.Column("queued_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("claimed_until", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("image_url"),
+    )
+    # Cuenta los posts que comparten un archivo antes de borrarlo (ver 0004 sobre CONCURRENTLY).
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_posts_image_url",
+            "posts",
+            ["image_url"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_posts_image_url", table_name="posts", postgresql_concurrently=True, if_exists=True)
+    op.drop_table("media_deletions")
+    op.drop_column("posts", "image_variants")
@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+# Settings exige estas variables al importar la app; los tests no tocan la base.
+_workdir = tempfile.mkdtemp(prefix="miniface-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("MEDIA_DIR", f"{_workdir}/uploads")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
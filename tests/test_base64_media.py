@@ -0,0 +1,90 @@
+"""Decodificación de base64 por bloques (`Base64MediaWriter`) tal como la alimenta el parser JSON."""
+
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.json_stream import JSONObjectStream
+from app.core.media import Base64MediaWriter, media_path
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+def _store(text: bytes, chunk_size: int) -> bytes:
+    with Base64MediaWriter() as writer:
+        for start in range(0, len(text), chunk_size):
+            writer.feed(text[start : start + chunk_size])
+        image_url = writer.commit()
+    path = media_path(image_url)
+    assert path is not None
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 5, 76, 4096])
+@pytest.mark.parametrize(
+    "encode",
+    [
+        base64.b64encode,
+        base64.urlsafe_b64encode,
+        base64.encodebytes,
+        lambda data: base64.b64encode(data).rstrip(b"="),
+        lambda data: b"data:image/png;base64," + base64.b64encode(data),
+        lambda data: b"  \ndata:image/png;base64," + base64.encodebytes(data),
+    ],
+    ids=["standard", "urlsafe", "mime", "unpadded", "data-url", "data-url-mime"],
+)
+def test_decodes_any_chunk_split(encode, chunk_size: int) -> None:
+    assert _store(encode(PNG), chunk_size) == PNG
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64])
+def test_decodes_json_escaped_slashes_through_parser(chunk_size: int) -> None:
+    encoded = base64.b64encode(PNG)
+    assert b"/" in encoded
+    escaped = b"data:image\\/png;base64," + encoded.replace(b"/", b"\\/")
+    body = b'{"content": "x", "image_base64": "' + escaped + b'"}'
+
+    with Base64MediaWriter() as writer:
+        parser = JSONObjectStream(
+            {("image_base64",): lambda: writer.feed}, max_buffered_bytes=1024, max_depth=4
+        )
+        for start in range(0, len(body), chunk_size):
+            parser.feed(body[start : start + chunk_size])
+        assert parser.close() == {"content": "x"}
+        image_url = writer.commit()
+
+    path = media_path(image_url)
+    assert path is not None and path.read_bytes() == PNG
+
+
+@pytest.mark.parametrize(
+    ("text", "detail"),
+    [
+        (b"", "image_base64 is empty"),
+        (b"data:image/png;base64,", "Invalid image_base64 data URL"),
+        (b"data:image/png;base64", "Invalid image_base64 data URL"),
+        (b"data:" + b"x" * 2000, "Invalid image_base64 data URL"),
+        (b"iVBO!!!!", "Invalid image_base64 payload"),
+        (base64.b64encode(PNG[:31]) + base64.b64encode(PNG[31:]), "Invalid image_base64 payload"),
+    ],
+    ids=[
+        "empty",
+        "data-url-without-data",
+        "data-url-without-comma",
+        "data-url-header-too-long",
+        "bad-chars",
+        "data-after-padding",
+    ],
+)
+def test_rejects_invalid_payloads(text: bytes, detail: str) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        _store(text, 7)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == detail
+
+
+def test_rejects_non_image_content() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        _store(base64.b64encode(b"not an image at all, just text"), 5)
+    assert exc_info.value.status_code == 400
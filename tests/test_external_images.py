@@ -0,0 +1,207 @@
+"""Descarga de imágenes externas de n8n contra un servidor HTTP local."""
+
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes.automation import _download_external_image
+from app.core import http
+from app.core.config import settings
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 56
+MAX_BYTES = 4096
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.0: sin Content-Length el body termina al cerrar la conexión.
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(self, body: bytes, content_type: str = "image/png", length: str | None = "auto") -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if length == "auto":
+            self.send_header("Content-Length", str(len(body)))
+        elif length is not None:
+            self.send_header("Content-Length", length)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        path = self.path
+        if path == "/image.png":
+            self._send(PNG)
+        elif path.startswith("/redirect/"):
+            remaining = int(path.rsplit("/", 1)[1])
+            self.send_response(302)
+            self.send_header("Location", "/image.png" if remaining <= 1 else f"/redirect/{remaining - 1}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif path == "/slow":
+            time.sleep(1.0)
+            self._send(PNG)
+        elif path == "/html":
+            self._send(b"<html></html>", content_type="text/html; charset=utf-8")
+        elif path == "/fake-image":
+            self._send(b"<html>not really a png</html>")
+        elif path == "/declared-too-large":
+            self._send(PNG, length=str(MAX_BYTES + 1))
+        elif path == "/no-length-too-large":
+            self._send(PNG + b"\x00" * MAX_BYTES, length=None)
+        elif path == "/understated-length":
+            self._send(PNG + b"\x00" * MAX_BYTES, length=str(len(PNG)))
+        elif path == "/invalid-length":
+            self._send(PNG, length="abc")
+        else:
+            self.send_error(404)
+
+
+@pytest.fixture(scope="module")
+def server() -> Iterator[str]:
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def download_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    monkeypatch.setattr(settings, "media_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "media_max_upload_bytes", MAX_BYTES)
+    monkeypatch.setattr(settings, "http_max_redirects", 3)
+    monkeypatch.setattr(settings, "http_read_timeout_seconds", 0.3)
+    monkeypatch.setattr(settings, "http_connect_timeout_seconds", 0.3)
+    # El cliente compartido toma la configuración al crearse.
+    monkeypatch.setattr(http, "_client", None)
+    yield tmp_path
+    http._client = None
+
+
+async def _download_error(url: str) -> HTTPException:
+    try:
+        await _download_external_image(url)
+    except HTTPException as exc:
+        return exc
+    finally:
+        await http.close_http_client()
+    raise AssertionError(f"{url} was accepted")
+
+
+def _stored_files(media_dir: Path) -> list[Path]:
+    return [path for path in media_dir.rglob("*") if path.is_file()]
+
+
+@pytest.mark.anyio
+async def test_downloads_image_into_media_store(server: str, download_settings: Path) -> None:
+    try:
+        url = await _download_external_image(f"{server}/image.png")
+    finally:
+        await http.close_http_client()
+    assert url.endswith(".png")
+    assert (download_settings / url.removeprefix(f"/{settings.media_dir}/")).read_bytes() == PNG
+
+
+@pytest.mark.anyio
+async def test_follows_redirects_up_to_the_limit(server: str) -> None:
+    try:
+        url = await _download_external_image(f"{server}/redirect/3")
+    finally:
+        await http.close_http_client()
+    assert url.endswith(".png")
+
+
+@pytest.mark.anyio
+async def test_rejects_too_many_redirects(server: str) -> None:
+    exc = await _download_error(f"{server}/redirect/4")
+    assert exc.status_code == 400
+    assert exc.detail == "image_url has too many redirects"
+
+
+@pytest.mark.anyio
+async def test_read_timeout(server: str) -> None:
+    exc = await _download_error(f"{server}/slow")
+    assert exc.status_code == 400
+    assert exc.detail == "image_url could not be fetched"
+
+
+@pytest.mark.anyio
+async def test_connect_timeout() -> None:
+    # Un socket que escucha pero nunca acepta, con la cola llena: el SYN siguiente queda sin respuesta.
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(0)
+    port = listener.getsockname()[1]
+    fillers = []
+    try:
+        for _ in range(4):
+            filler = socket.socket()
+            filler.setblocking(False)
+            filler.connect_ex(("127.0.0.1", port))
+            fillers.append(filler)
+        started = time.monotonic()
+        exc = await _download_error(f"http://127.0.0.1:{port}/image.png")
+        assert time.monotonic() - started < 5
+    finally:
+        for filler in fillers:
+            filler.close()
+        listener.close()
+    assert exc.status_code == 400
+    assert exc.detail == "image_url could not be fetched"
+
+
+@pytest.mark.anyio
+async def test_rejects_declared_length_over_cap_before_reading(server: str, download_settings: Path) -> None:
+    exc = await _download_error(f"{server}/declared-too-large")
+    assert exc.status_code == 413
+    assert _stored_files(download_settings) == []
+
+
+@pytest.mark.anyio
+async def test_caps_body_without_content_length(server: str, download_settings: Path) -> None:
+    exc = await _download_error(f"{server}/no-length-too-large")
+    assert exc.status_code == 413
+    # El temporal se borra al abortar.
+    assert _stored_files(download_settings) == []
+
+
+@pytest.mark.anyio
+async def test_understated_content_length_cannot_bypass_cap(server: str, download_settings: Path) -> None:
+    try:
+        url = await _download_external_image(f"{server}/understated-length")
+    finally:
+        await http.close_http_client()
+    # Solo se leen los bytes declarados: el resto del body nunca llega al disco.
+    stored = download_settings / url.removeprefix(f"/{settings.media_dir}/")
+    assert stored.read_bytes() == PNG
+
+
+@pytest.mark.anyio
+async def test_rejects_invalid_content_length(server: str, download_settings: Path) -> None:
+    exc = await _download_error(f"{server}/invalid-length")
+    assert exc.status_code == 400
+    assert _stored_files(download_settings) == []
+
+
+@pytest.mark.anyio
+async def test_rejects_non_image_content_type(server: str) -> None:
+    exc = await _download_error(f"{server}/html")
+    assert exc.status_code == 400
+    assert exc.detail == "image_url must point to an image"
+
+
+@pytest.mark.anyio
+async def test_rejects_image_content_type_with_non_image_body(server: str, download_settings: Path) -> None:
+    exc = await _download_error(f"{server}/fake-image")
+    assert exc.status_code == 400
+    assert exc.detail == "File must be an image"
+    assert _stored_files(download_settings) == []
@@ -0,0 +1,101 @@
+"""Parser JSON incremental de /n8n/posts: límites, errores y anidamiento."""
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app.core.json_stream import JSONObjectStream
+
+
+def _parse(body: bytes, chunk_size: int | None = None, **limits: int):
+    collected: list[bytes] = []
+    parser = JSONObjectStream(
+        {("image_base64",): lambda: collected.append},
+        max_buffered_bytes=limits.get("max_buffered_bytes", 1024 * 1024),
+        max_depth=limits.get("max_depth", 32),
+    )
+    size = chunk_size or len(body) or 1
+    for start in range(0, len(body), size):
+        parser.feed(body[start : start + size])
+    return parser.close(), b"".join(collected)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, None])
+def test_matches_orjson_for_any_chunking(chunk_size: int | None) -> None:
+    document = {
+        "content": 'hola "mundo" \\ ñ \U0001f600',
+        "author_email": "a@b.co",
+        "tags": [1, -2.5e3, True, False, None, [], {}],
+        "image_binary": {"mimeType": "image/png", "nested": [{"a": [1, [2]]}]},
+    }
+    parsed, streamed = _parse(orjson.dumps(document), chunk_size)
+    assert parsed == document
+    assert streamed == b""
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, None])
+def test_streamed_field_is_unescaped_and_left_out(chunk_size: int | None) -> None:
+    body = b'{"content": "x", "image_base64": "ab\\/c\\u0064\\n", "after": 1}'
+    parsed, streamed = _parse(body, chunk_size)
+    assert parsed == {"content": "x", "after": 1}
+    assert streamed == b"ab/cd\n"
+
+
+def test_streamed_field_does_not_count_toward_budget() -> None:
+    body = b'{"image_base64": "' + b"A" * 10_000 + b'"}'
+    parsed, streamed = _parse(body, 100, max_buffered_bytes=200)
+    assert parsed == {}
+    assert len(streamed) == 10_000
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b'{"content": "' + b"x" * 2000 + b'"}',
+        b"[" + b"{}," * 1000 + b"{}]",
+        b"[" + b"[]," * 1000 + b"[]]",
+        b"[" + b"0," * 1000 + b"0]",
+    ],
+)
+def test_buffered_budget_counts_strings_containers_and_elements(body: bytes) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        _parse(body, 64, max_buffered_bytes=1024)
+    assert exc_info.value.status_code == 413
+
+
+@pytest.mark.parametrize("opener", [b"[", b'{"a":'])
+def test_nesting_depth_is_limited(opener: bytes) -> None:
+    closer = b"]" if opener == b"[" else b"}"
+    _parse(opener * 4 + b"1" + closer * 4, max_depth=4)
+    with pytest.raises(HTTPException) as exc_info:
+        _parse(opener * 100_000, 4096, max_depth=4)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "JSON body is nested too deeply"
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"",
+        b"{",
+        b'{"a" 1}',
+        b'{"a": 1,}',
+        b"[1 2]",
+        b"[1,,2]",
+        b'{"a": 1]',
+        b"[1}",
+        b"{} {}",
+        b'{"a": tru}',
+        b'{"a": 01}',
+        b'{"a": "x',
+        b'{"a": "\\q"}',
+        b'{"image_base64": "\\uZZZZ"}',
+        b'{"image_base64": "\\q"}',
+        b'{1: 2}',
+    ],
+)
+def test_invalid_json_is_rejected(body: bytes) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        _parse(body, 3)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid JSON body"